@@ -2,6 +2,9 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from routes import api_router
 from schemas import init_db
+from services.llm_service import close_openai_client
+from services.cpu_pool import cpu_pool
+from services.youtube_data_client import close_youtube_http_client
 from fastapi.middleware.cors import CORSMiddleware
 
 @asynccontextmanager
@@ -10,6 +13,9 @@ async def life_span(app: FastAPI):
     await init_db()
     yield
     print("Shutting down...")
+    await close_openai_client()
+    await close_youtube_http_client()
+    cpu_pool.shutdown()
 
 app = FastAPI(title="Micro Apis", lifespan=life_span, openapi_url="/open-api", redoc_url="/redoc")
 origins = [
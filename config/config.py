@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -22,6 +22,127 @@ class Settings(BaseSettings):
     YT_GOOGLE_API_KEY: str = os.getenv("YT_GOOGLE_API_KEY", "your-youtube-api-key")
     YT_COOKIES: str = os.getenv("YT_COOKIES", "your-youtube-cookies")
 
+    # OpenAI HTTP connection pool shared by every Llm_Service in the process
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+    # YouTube Data API client; point the base URL at a local fake server in tests
+    YT_DATA_API_BASE_URL: str = os.getenv("YT_DATA_API_BASE_URL", "https://www.googleapis.com/youtube/v3/")
+    YT_DATA_API_TIMEOUT_SECONDS: float = float(os.getenv("YT_DATA_API_TIMEOUT_SECONDS", "15"))
+    YT_DATA_API_MAX_CONNECTIONS: int = int(os.getenv("YT_DATA_API_MAX_CONNECTIONS", "10"))
+    YT_DATA_API_MAX_RETRIES: int = int(os.getenv("YT_DATA_API_MAX_RETRIES", "4"))
+    YT_DATA_API_RETRY_BASE_SECONDS: float = float(os.getenv("YT_DATA_API_RETRY_BASE_SECONDS", "1"))
+    YT_DATA_API_RETRY_MAX_SECONDS: float = float(os.getenv("YT_DATA_API_RETRY_MAX_SECONDS", "30"))
+    YT_COMMENTS_PAGE_DELAY_SECONDS: float = float(os.getenv("YT_COMMENTS_PAGE_DELAY_SECONDS", "0.1"))
+
+    # Generate posts for every requested social platform of a content in a single LLM call
+    FUSED_SOCIAL_GENERATION: bool = os.getenv("FUSED_SOCIAL_GENERATION", "true").lower() == "true"
+
+    # Max chunk summaries in flight at once for a single transcript
+    SUMMARY_CONCURRENCY: int = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+    # Transcript chunks pack whole sentences/caption segments up to this size, repeating at most the overlap
+    SUMMARY_CHUNK_TOKENS: int = int(os.getenv("SUMMARY_CHUNK_TOKENS", "10000"))
+    SUMMARY_CHUNK_OVERLAP_TOKENS: int = int(os.getenv("SUMMARY_CHUNK_OVERLAP_TOKENS", "100"))
+    # Chunk summaries are tree-reduced until their joined size fits SUMMARY_TARGET_TOKENS
+    SUMMARY_TARGET_TOKENS: int = int(os.getenv("SUMMARY_TARGET_TOKENS", "6000"))
+    SUMMARY_REDUCE_GROUP_TOKENS: int = int(os.getenv("SUMMARY_REDUCE_GROUP_TOKENS", "8000"))
+
+    # Model routing: keys are "<job_context>:<stage>", "<stage>" or "<job_context>", most specific wins,
+    # e.g. LLM_MODEL_ROUTES='{"chunk_summary": "gpt-4o-mini", "comment_sentiment": "gpt-4o-mini"}'
+    LLM_DEFAULT_MODEL: str = os.getenv("LLM_DEFAULT_MODEL", "gpt-4o")
+    LLM_MODEL_ROUTES: Dict[str, str] = {}
+
+    # Per-call policy: OpenAI's own retries are disabled so these are the only ones.
+    # Hedging sends a duplicate request once a call outlives its route's p95 latency.
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "1"))
+    LLM_RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "30"))
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_JSON_REPAIR_ATTEMPTS: int = int(os.getenv("LLM_JSON_REPAIR_ATTEMPTS", "1"))
+
+    # LLM response cache: in-process LRU in front of a Mongo collection with TTL eviction
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+    # Per-model request/token budgets, e.g. LLM_RATE_LIMITS='{"gpt-4o": {"rpm": 500, "tpm": 30000}}'
+    LLM_RATE_LIMITS: Dict[str, Dict[str, int]] = {"gpt-4o": {"rpm": 500, "tpm": 30000}}
+    LLM_DEFAULT_RPM: int = int(os.getenv("LLM_DEFAULT_RPM", "500"))
+    LLM_DEFAULT_TPM: int = int(os.getenv("LLM_DEFAULT_TPM", "30000"))
+    # Completion tokens reserved up front until the real usage is known
+    LLM_EXPECTED_COMPLETION_TOKENS: int = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "1000"))
+
+    # Job contexts whose LLM calls are grouped into batch submissions instead of interactive calls
+    LLM_BATCH_CONTEXTS: List[str] = []
+    LLM_BATCH_BACKEND: str = os.getenv("LLM_BATCH_BACKEND", "openai") # "openai" or "local"
+    LLM_BATCH_LOCAL_DIR: str = os.getenv("LLM_BATCH_LOCAL_DIR", "/tmp/micro-apis-batches")
+    LLM_BATCH_MAX_SIZE: int = int(os.getenv("LLM_BATCH_MAX_SIZE", "500"))
+    LLM_BATCH_FLUSH_SECONDS: float = float(os.getenv("LLM_BATCH_FLUSH_SECONDS", "30"))
+    LLM_BATCH_POLL_SECONDS: float = float(os.getenv("LLM_BATCH_POLL_SECONDS", "60"))
+    # A job waiting on batch results is parked and woken when its batch completes; this is only
+    # the fallback delay before it is looked at again
+    LLM_BATCH_WAIT_SECONDS: float = float(os.getenv("LLM_BATCH_WAIT_SECONDS", "600"))
+
+    # Jobs a worker process runs at once. Idle slots wake on job notifications and otherwise
+    # poll as a safety net, backing off between these bounds
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "4"))
+    WORKER_IDLE_MIN_SECONDS: float = float(os.getenv("WORKER_IDLE_MIN_SECONDS", "5"))
+    WORKER_IDLE_MAX_SECONDS: float = float(os.getenv("WORKER_IDLE_MAX_SECONDS", "60"))
+    JOB_NOTIFIER: str = os.getenv("JOB_NOTIFIER", "change_stream") # "change_stream" or "local"
+
+    # Claim order: priority per job context (higher first), then fair share of running jobs
+    # across users. A waiting priority class gains one point per JOB_PRIORITY_AGING_SECONDS
+    # until it joins the class above.
+    # JOB_USER_WEIGHTS='{"<user_id>": 2}' gives a user twice the default share.
+    JOB_PRIORITIES: Dict[str, int] = {
+        "blog": 10,
+        "twitter_post": 5,
+        "reddit_post": 5,
+        "linked_in_post": 5,
+        "facebook_post": 5,
+        "comment_sentiment_analysis": 0,
+        "comment_idea_generation": 0,
+        "comment_analysis": 0,
+    }
+    JOB_PRIORITY_AGING_SECONDS: float = float(os.getenv("JOB_PRIORITY_AGING_SECONDS", "600"))
+    JOB_USER_WEIGHTS: Dict[str, float] = {}
+
+    # Jobs failing with a retryable error are re-queued with exponential backoff, then
+    # dead-lettered once they have been attempted JOB_MAX_ATTEMPTS times
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "4"))
+    JOB_RETRY_BASE_SECONDS: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+    JOB_RETRY_MAX_SECONDS: float = float(os.getenv("JOB_RETRY_MAX_SECONDS", "1800"))
+
+    # A job whose shared input (comments, summary) another worker is producing is parked and
+    # woken when that finishes; this is only the fallback delay before it is looked at again
+    PIPELINE_WAIT_SECONDS: float = float(os.getenv("PIPELINE_WAIT_SECONDS", "30"))
+
+    # How often a worker checks whether any job it is running has been cancelled
+    JOB_CANCEL_POLL_SECONDS: float = float(os.getenv("JOB_CANCEL_POLL_SECONDS", "2"))
+
+    # Intermediate results (chunk summaries, per-chunk sentiment and ideas) are written to Mongo
+    # in batches of this size so a retried job can skip them
+    CHECKPOINT_FLUSH_SIZE: int = int(os.getenv("CHECKPOINT_FLUSH_SIZE", "5"))
+    # On SIGTERM running jobs get this long to finish before they are stopped and re-queued
+    WORKER_SHUTDOWN_GRACE_SECONDS: float = float(os.getenv("WORKER_SHUTDOWN_GRACE_SECONDS", "20"))
+
+    # Executors for CPU-heavy and blocking steps; text below CPU_POOL_MIN_CHARS is processed inline
+    CPU_POOL_PROCESSES: int = int(os.getenv("CPU_POOL_PROCESSES", "2"))
+    CPU_POOL_THREADS: int = int(os.getenv("CPU_POOL_THREADS", "4"))
+    CPU_POOL_MIN_CHARS: int = int(os.getenv("CPU_POOL_MIN_CHARS", "20000"))
+
+    # Users allowed on the /admin routes
+    ADMIN_EMAILS: List[str] = []
+
+    # A claimed job is leased to its worker; heartbeats renew the lease and the reaper
+    # re-queues IN_PROGRESS jobs whose lease ran out (e.g. the worker crashed)
+    WORKER_LEASE_SECONDS: int = int(os.getenv("WORKER_LEASE_SECONDS", "300"))
+    WORKER_HEARTBEAT_SECONDS: float = float(os.getenv("WORKER_HEARTBEAT_SECONDS", "60"))
+    WORKER_REAPER_INTERVAL_SECONDS: float = float(os.getenv("WORKER_REAPER_INTERVAL_SECONDS", "60"))
+
     class Config:
         env_file = ".env"
         from_attributes = True
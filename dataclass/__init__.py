@@ -1 +1,4 @@
-from .social_post import SocialPost, SocialPostResponse
\ No newline at end of file
+from .social_post import SocialPost, SocialPostResponse
+from .tokenized_text import TokenizedText
+from .text_chunk import TextChunk
+from .prompt import Prompt
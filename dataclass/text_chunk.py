@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+@dataclass
+class TextChunk:
+    text: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+    def render(self) -> str:
+        """Chunk text as sent to the LLM, prefixed with its source time range when known."""
+        if self.start is None:
+            return self.text
+        return f"[{format_timestamp(self.start)} - {format_timestamp(self.end or self.start)}] {self.text}"
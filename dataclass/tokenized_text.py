@@ -0,0 +1,8 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class TokenizedText:
+    token_count: int
+    chunks: List[str] = field(default_factory=list)
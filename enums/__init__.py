@@ -1,2 +1,4 @@
 from .job_status import JobStatus
-from .job_context import JobContext
\ No newline at end of file
+from .job_context import JobContext
+from .llm_stage import LlmStage
+from .pipeline_node import PipelineNodeKind
\ No newline at end of file
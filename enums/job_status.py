@@ -6,6 +6,7 @@ class JobStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
+    DEAD_LETTER = "dead_letter" # retryable failures that ran out of attempts
 
     def __str__(self):
         return self.value
\ No newline at end of file
@@ -0,0 +1,15 @@
+from enum import Enum
+
+class LlmStage(str, Enum):
+    CHUNK_SUMMARY = "chunk_summary"
+    SUMMARY_REDUCE = "summary_reduce"
+    BLOG_OUTLINE = "blog_outline"
+    BLOG_POST = "blog_post"
+    SOCIAL_POST = "social_post"
+    COMMENT_SENTIMENT = "comment_sentiment"
+    COMMENT_IDEAS = "comment_ideas"
+    AGGREGATE = "aggregate"
+    JSON_REPAIR = "json_repair"
+
+    def __str__(self):
+        return self.value
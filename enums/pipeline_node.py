@@ -0,0 +1,8 @@
+from enum import Enum
+
+class PipelineNodeKind(str, Enum):
+    COMMENTS = "comments"
+    SUMMARY = "summary"
+
+    def __str__(self):
+        return self.value
@@ -2,6 +2,7 @@
 from fastapi import Request, HTTPException, Depends
 from utils.jwt import decode_token
 from schemas import UserModel
+from config import settings
 
 async def get_current_user(request: Request):
     token = request.cookies.get("access_token")
@@ -17,3 +18,8 @@ async def get_current_user(request: Request):
         return user
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+async def get_admin_user(current_user: UserModel = Depends(get_current_user)):
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
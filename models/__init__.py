@@ -2,4 +2,5 @@ from .email_validation import EmailValidationRequest, EmailValidationResponse
 from .youtube_validation import Extract_Youtube_Transacription
 from .user_schema import UserCreate, UserRead, UserLogin
 from .yt_extraction_request import YTExtractionRequest
-from .content import PaginatedContentWithJobs, ContentWithJobs, ContentJobOut
\ No newline at end of file
+from .content import PaginatedContentWithJobs, ContentWithJobs, ContentJobOut
+from .admin import RedriveJobsRequest
\ No newline at end of file
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from enums import JobContext
+
+class RedriveJobsRequest(BaseModel):
+    # with no filters every dead-lettered job is re-queued
+    job_ids: Optional[List[str]] = None
+    context: Optional[JobContext] = None
+    user_id: Optional[str] = None
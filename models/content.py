@@ -10,6 +10,10 @@ class ContentJobOut(BaseModel):
     status: JobStatus
     context: Optional[str] = None
     error: Optional[str] = None
+    token_used: Optional[int] = None
+    usage: Optional[dict] = None
+    attempts: Optional[int] = None
+    next_run_at: Optional[datetime] = None
     user_id: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
@@ -1,9 +1,12 @@
 from .blog_outline import get_blog_outline_prompt
 from .blog_post import get_blog_post_prompt
-from .summary import get_summary_prompt
+from .summary import get_summary_prompt, get_summary_reduce_prompt
 from .twitter_post import get_twitter_post_prompt
 from .reddit_post_prompt import get_reddit_post_prompt
 from .video_ideas_from_comments import get_video_ideas_prompt
 from .sentiment_analysis_insight import build_sentiment_insight_prompt
 from .sentiment_analysis_aggregate import build_aggregate_prompt
-from .video_ideas_from_comments_aggregate import get_video_ideas_aggregate_prompt
\ No newline at end of file
+from .video_ideas_from_comments_aggregate import get_video_ideas_aggregate_prompt
+from .multi_platform_post import get_multi_platform_post_prompt
+from .json_repair import get_json_repair_prompt
+from .registry import PROMPTS, PromptTemplate, register_prompt, prompt_cache_stats
\ No newline at end of file
@@ -0,0 +1,20 @@
+from dataclass import Prompt
+from .registry import register_prompt
+
+JSON_REPAIR_PROMPT = register_prompt(
+    "json_repair",
+    system="""
+The user message contains a response that was supposed to be a single valid JSON value but fails to parse.
+Return the same data as valid JSON. Keep every key and value that is present, close any structure that was cut off,
+and do not add commentary, markdown fences or fields that were not there.
+""",
+    user_template="""
+Parser error: $error
+***********************
+$content
+***********************
+""",
+)
+
+def get_json_repair_prompt(content: str, error: str) -> Prompt:
+    return JSON_REPAIR_PROMPT.render(content=content, error=error)
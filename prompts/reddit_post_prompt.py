@@ -1,36 +1,46 @@
 from typing import Optional
+from dataclass import Prompt
+from .registry import register_prompt
 
-def get_reddit_post_prompt(content: str, count: int, styleExample: Optional[str] = None) -> str:
-    prompt = f"""
+REDDIT_POST_PROMPT = register_prompt(
+    "reddit_post",
+    system="""
 You are a skilled Reddit content creator helping a YouTuber repurpose their video transcript into native Reddit posts.
 
-Here is the source content:
-\"\"\"
-{content}
-\"\"\"
-
 Your task is to:
-- Write {count} Reddit posts.
+- Write the number of Reddit posts requested in the user message.
 - Each post should include a compelling title and a post body written in Reddit-native tone (authentic, helpful, discussion-oriented).
 - Avoid self-promotion or referring to "the video".
 - Encourage engagement by ending with a thoughtful or open-ended question.
 - Use a tone that feels natural to Reddit: informative, curious, or experience-driven.
 - Do NOT include hashtags.
-{"Here is a style example:\n" + styleExample if styleExample else ""}
+- If a style example is given, match its style.
 
 Output format (must be valid raw JSON only, no markdown, no string escaping):
-{{
+{
   "posts": [
-    {{
+    {
       "title": "Post title here",
       "content": "The main post content, suitable for Reddit.",
       "tone": "informative"
-    }},
+    },
     ...
   ],
-  "count": {count}
-}}
+  "count": number_of_posts
+}
 
 Only return valid JSON. Do NOT explain anything. Do NOT wrap in backticks.
-"""
-    return prompt
+""",
+    user_template="""
+Number of posts: $count
+$style
+Here is the source content:
+\"\"\"
+$content
+\"\"\"
+""",
+)
+
+def get_reddit_post_prompt(content: str, count: int, styleExample: Optional[str] = None) -> Prompt:
+    style = f"Here is a style example:\n{styleExample}\n" if styleExample else ""
+    return REDDIT_POST_PROMPT.render(content=content, count=count, style=style)
@@ -0,0 +1,52 @@
+from string import Template
+from typing import Dict
+from dataclass import Prompt
+
+
+class PromptTemplate:
+    """
+    A prompt split into static instructions, sent as the system message, and a user
+    message that carries the variable payload last. Keeping the instructions byte-identical
+    across calls lets the provider reuse its cached prompt prefix.
+    """
+
+    def __init__(self, name: str, system: str, user_template: str = "$content"):
+        self.name = name
+        self.system = system.strip()
+        # compiled once at import; rendering is a single substitution pass over a small template
+        self.user_template = Template(user_template.strip())
+
+    def render(self, **payload) -> Prompt:
+        return Prompt(name=self.name, system=self.system, user=self.user_template.substitute(payload))
+
+
+PROMPTS: Dict[str, PromptTemplate] = {}
+
+def register_prompt(name: str, system: str, user_template: str = "$content") -> PromptTemplate:
+    template = PromptTemplate(name, system, user_template)
+    PROMPTS[name] = template
+    return template
+
+
+class PromptCacheStats:
+    """
+    Provider-side prompt cache hits per template, from usage.prompt_tokens_details.cached_tokens.
+    """
+
+    def __init__(self):
+        self.templates: Dict[str, dict] = {}
+
+    def record(self, name: str, prompt_tokens: int, cached_tokens: int):
+        stats = self.templates.setdefault(name, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        stats["calls"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            name: {**stats, "hit_rate": stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0}
+            for name, stats in self.templates.items()
+        }
+
+
+prompt_cache_stats = PromptCacheStats()
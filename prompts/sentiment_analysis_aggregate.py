@@ -1,20 +1,11 @@
 import json
+from dataclass import Prompt
+from .registry import register_prompt
 
-def build_aggregate_prompt(distributions, summaries, positives, negatives) -> str:
-    return f"""
-You are a sentiment analysis assistant. Below is the data gathered from multiple chunks of YouTube comments.
-
-Distributions (from each chunk):
-{json.dumps(distributions, indent=2)}
-
-Summaries (from each chunk):
-{json.dumps(summaries, indent=2)}
-
-Top Positive Comments:
-{json.dumps(positives, indent=2)}
-
-Top Negative Comments:
-{json.dumps(negatives, indent=2)}
+SENTIMENT_AGGREGATE_PROMPT = register_prompt(
+    "sentiment_analysis_aggregate",
+    system="""
+You are a sentiment analysis assistant. The user message contains the data gathered from multiple chunks of YouTube comments.
 
 Your tasks:
 1. Combine the distributions to create an overall sentiment distribution in % (positive, neutral, negative).
@@ -24,15 +15,37 @@ Your tasks:
 
 Return ONLY a valid JSON object in this format:
 
-{{
+{
   "summary": "...",
-  "distribution": {{
+  "distribution": {
     "positive": ...,
     "neutral": ...,
     "negative": ...
-  }},
+  },
   "top_positive_comments": ["...", "...", "..."],
   "top_negative_comments": ["...", "..."]
-}}
+}
 Only return valid JSON. Do NOT explain anything. Do NOT wrap in backticks.
-"""
+""",
+    user_template="""
+Distributions (from each chunk):
+$distributions
+
+Summaries (from each chunk):
+$summaries
+
+Top Positive Comments:
+$positives
+
+Top Negative Comments:
+$negatives
+""",
+)
+
+def build_aggregate_prompt(distributions, summaries, positives, negatives) -> Prompt:
+    return SENTIMENT_AGGREGATE_PROMPT.render(
+        distributions=json.dumps(distributions, indent=2),
+        summaries=json.dumps(summaries, indent=2),
+        positives=json.dumps(positives, indent=2),
+        negatives=json.dumps(negatives, indent=2),
+    )
@@ -1,16 +1,15 @@
 
 from typing import List, Dict
 from schemas import Comment
+from dataclass import Prompt
+from .registry import register_prompt
 
-def build_sentiment_insight_prompt(comments: List[Comment]) -> str:
-    comments_text = "\n".join([f"- {c.text}" for c in comments])
-    return f"""
+SENTIMENT_INSIGHT_PROMPT = register_prompt(
+    "sentiment_analysis_insight",
+    system="""
 You are an AI assistant analyzing YouTube comments for insights.
 
-Here are the comments:
-{comments_text}
-
-Please:
+For the comments in the user message, please:
 1. Classify each comment as positive, neutral, or negative.
 2. Return the sentiment distribution as percentages.
 3. Write a short summary of the overall sentiment.
@@ -19,13 +18,13 @@ Please:
 
 Return only valid JSON in this exact format:
 
-{{
+{
   "summary": "Short summary of trends and tone",
-  "distribution": {{
+  "distribution": {
     "positive": 64.7,
     "neutral": 23.5,
     "negative": 11.8
-  }},
+  },
   "top_positive_comments": [
     "I learned so much, thank you!",
     "This was super clear and helpful.",
@@ -36,6 +35,15 @@ Return only valid JSON in this exact format:
     "You didn’t explain the key concept clearly.",
     "... up to 10 total ..."
   ]
-}}
+}
 Only return valid JSON. Do NOT explain anything. Do NOT wrap in backticks.
-"""
+""",
+    user_template="""
+Here are the comments:
+$comments
+""",
+)
+
+def build_sentiment_insight_prompt(comments: List[Comment]) -> Prompt:
+    comments_text = "\n".join([f"- {c.text}" for c in comments])
+    return SENTIMENT_INSIGHT_PROMPT.render(comments=comments_text)
@@ -1,13 +1,42 @@
-def get_summary_prompt(content: str):
-    prompt = """
-    You are an expert in summarizing content. Given the following text, create a concise summary that captures the main points and key details.
-
-    Ensure that the summary is structured, clear, and engaging. The summary should be brief but informative, highlighting the most important aspects of the content.
-    Here is the text to summarize:
-    ***********************
-    {content}
-    ***********************
-    Make sure to format the summary in a way that is easy to read and follow, using appropriate headings and bullet points if necessary.
-    The summary should not have unnecessary details or filler content, but should instead focus on the core message and insights of the original text.
-    """
-    return prompt.format(content=content)
\ No newline at end of file
+from dataclass import Prompt
+from .registry import register_prompt
+
+SUMMARY_PROMPT = register_prompt(
+    "summary",
+    system="""
+You are an expert in summarizing content. Given the text in the user message, create a concise summary that captures the main points and key details.
+
+Ensure that the summary is structured, clear, and engaging. The summary should be brief but informative, highlighting the most important aspects of the content.
+Make sure to format the summary in a way that is easy to read and follow, using appropriate headings and bullet points if necessary.
+The summary should not have unnecessary details or filler content, but should instead focus on the core message and insights of the original text.
+""",
+    user_template="""
+Here is the text to summarize:
+***********************
+$content
+***********************
+""",
+)
+
+SUMMARY_REDUCE_PROMPT = register_prompt(
+    "summary_reduce",
+    system="""
+You are an expert in summarizing content. The summaries in the user message were written for consecutive parts of the same transcript, in order.
+Merge them into a single concise summary that keeps the main points, key details and the order in which topics come up.
+
+Remove repetition between the parts, but do not drop any point that appears in only one of them.
+Make sure to format the summary in a way that is easy to read and follow, using appropriate headings and bullet points if necessary.
+""",
+    user_template="""
+Here are the summaries to merge:
+***********************
+$content
+***********************
+""",
+)
+
+def get_summary_prompt(content: str) -> Prompt:
+    return SUMMARY_PROMPT.render(content=content)
+
+def get_summary_reduce_prompt(summaries: list) -> Prompt:
+    return SUMMARY_REDUCE_PROMPT.render(content="\n\n".join(summaries))
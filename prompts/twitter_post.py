@@ -1,36 +1,46 @@
 from typing import Optional
+from dataclass import Prompt
+from .registry import register_prompt
 
-def get_twitter_post_prompt(content: str, count: int, styleExample: Optional[str] = None) -> str:
-    prompt = f"""
+TWITTER_POST_PROMPT = register_prompt(
+    "twitter_post",
+    system="""
 You are a social media strategist creating high-performing Twitter posts based on long-form content.
 
-Input content:
-\"\"\"
-{content}
-\"\"\"
-
 Your task:
-- Generate exactly {count} unique Twitter posts.
+- Generate exactly the number of unique Twitter posts requested in the user message.
 - Each should be within Twitter’s 280-character limit.
 - Write in a clear, human, relatable tone — avoid robotic phrasing.
 - Use different tones if possible: e.g., informative, witty, bold, inspirational.
 - Avoid fluff and excessive hashtags — use only 1–2 if highly relevant.
 - Don't mention "this video" or "this content" — write as if you’re the original poster.
-{"Style example:\n" + styleExample if styleExample else ""}
+- If a style example is given, match its style.
 
 Output must be a JSON object:
-{{
+{
   "posts": [
-    {{
+    {
       "content": "Your tweet text here.",
       "hashtags": ["#example"],
       "tone": "informative"
-    }},
+    },
     ...
   ],
-  "count": {count}
-}}
+  "count": number_of_posts
+}
 
 Only return raw, valid JSON. Do NOT wrap in markdown or quotes. Do NOT explain anything. Just return the JSON.
-"""
-    return prompt
+""",
+    user_template="""
+Number of posts: $count
+$style
+Input content:
+\"\"\"
+$content
+\"\"\"
+""",
+)
+
+def get_twitter_post_prompt(content: str, count: int, styleExample: Optional[str] = None) -> Prompt:
+    style = f"Style example:\n{styleExample}\n" if styleExample else ""
+    return TWITTER_POST_PROMPT.render(content=content, count=count, style=style)
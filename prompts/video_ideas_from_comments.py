@@ -1,16 +1,14 @@
 from typing import List, Dict
 from schemas import Comment
+from dataclass import Prompt
+from .registry import register_prompt
 
-def get_video_ideas_prompt(comments: List[Comment]) -> str:
-    comments_text = "\n".join([f"{c.text}" for c in comments])
-
-    prompt = f"""
+VIDEO_IDEAS_PROMPT = register_prompt(
+    "video_ideas_from_comments",
+    system="""
 You're an expert YouTube content strategist.
 
-Your task is to read through the following viewer comments and come up with engaging and relevant YouTube video ideas that respond to common questions, themes, and interest areas.
-
-Here are the comments:
-{comments_text}
+Your task is to read through the viewer comments in the user message and come up with engaging and relevant YouTube video ideas that respond to common questions, themes, and interest areas.
 
 Please generate 5–10 unique YouTube video ideas that:
 - Are based on patterns or interesting suggestions in the comments
@@ -21,15 +19,23 @@ Please generate 5–10 unique YouTube video ideas that:
 
 Return the results in this JSON format:
 
-{{
+{
   "ideas": [
     "Title 1",
     "Title 2",
     ...
   ],
   "count": total_number_of_ideas
-}}
+}
 
 Only return valid JSON. Do NOT explain anything. Do NOT wrap in backticks.
-"""
-    return prompt
+""",
+    user_template="""
+Here are the comments:
+$comments
+""",
+)
+
+def get_video_ideas_prompt(comments: List[Comment]) -> Prompt:
+    comments_text = "\n".join([f"{c.text}" for c in comments])
+    return VIDEO_IDEAS_PROMPT.render(comments=comments_text)
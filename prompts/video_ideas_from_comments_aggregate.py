@@ -1,16 +1,13 @@
 from typing import List, Dict
-from schemas import Comment
+from dataclass import Prompt
+from .registry import register_prompt
 
-def get_video_ideas_aggregate_prompt(ideas: List[str]) -> str:
-    ideas_text = "\n".join(ideas)
-
-    prompt = f"""
+VIDEO_IDEAS_AGGREGATE_PROMPT = register_prompt(
+    "video_ideas_from_comments_aggregate",
+    system="""
 You're an expert YouTube content strategist.
 
-Your task is to read through the following ideas generate from youtube comments and aggregating them into 10-20 unique YouTube video ideas.
-
-Here are the ideas:
-{ideas_text}
+Your task is to read through the ideas in the user message, generated from youtube comments, and aggregate them into 10-20 unique YouTube video ideas.
 
 Please generate 10-20unique YouTube video ideas that:
 - That have frequent appearance in the ideas list
@@ -21,15 +18,22 @@ Please generate 10-20unique YouTube video ideas that:
 
 Return the results in this JSON format:
 
-{{
+{
   "ideas": [
     "Title 1",
     "Title 2",
     ...
   ],
   "count": total_number_of_ideas
-}}
+}
 
 Only return valid JSON. Do NOT explain anything. Do NOT wrap in backticks.
-"""
-    return prompt
+""",
+    user_template="""
+Here are the ideas:
+$ideas
+""",
+)
+
+def get_video_ideas_aggregate_prompt(ideas: List[str]) -> Prompt:
+    return VIDEO_IDEAS_AGGREGATE_PROMPT.render(ideas="\n".join(ideas))
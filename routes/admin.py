@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from middlewares import get_admin_user
+from models import RedriveJobsRequest
+from services.job_notifier import get_job_notifier
+from services.job_queue import queue_stats, redrive_dead_letter_jobs
+
+router = APIRouter()
+
+@router.get("/queue")
+async def get_queue_stats(current_user: dict = Depends(get_admin_user)):
+    return await queue_stats()
+
+@router.post("/jobs/redrive")
+async def redrive_jobs(request: RedriveJobsRequest, current_user: dict = Depends(get_admin_user)):
+    requeued = await redrive_dead_letter_jobs(
+        job_ids=request.job_ids,
+        context=request.context,
+        user_id=request.user_id,
+    )
+    if requeued:
+        await get_job_notifier().publish()
+    return {"requeued": requeued}
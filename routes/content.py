@@ -3,6 +3,7 @@ from beanie.operators import In
 from schemas import ContentModel, ContentJob, BlogModel, SocialModal
 from middlewares import get_current_user  # assumes you have an auth system
 from models import PaginatedContentWithJobs, ContentWithJobs, ContentJobOut
+from services.job_queue import cancel_jobs
 from bson import ObjectId
 
 
@@ -106,4 +107,62 @@ async def get_content_of_type(
         SocialModal.contentId == content_id,
         SocialModal.type == type
     ).to_list()
-    return socials if socials else []
\ No newline at end of file
+    return socials if socials else []
+
+@router.get("/usage/{content_id}")
+async def get_content_usage(
+    content_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    user_id = str(current_user.id)
+    content = await ContentModel.get(content_id)
+    if not content or content.userId != user_id:
+        return {"error": "Content not found or access denied."}
+
+    jobs = await ContentJob.find(ContentJob.content_id == content_id).to_list()
+
+    # roll the per-job stage usage up per job context, most expensive first
+    contexts = {}
+    for job in jobs:
+        context_usage = contexts.setdefault(str(job.context), {"jobs": 0, "total_tokens": 0, "duration_seconds": 0.0, "stages": {}})
+        context_usage["jobs"] += 1
+        context_usage["total_tokens"] += job.token_used or 0
+        for stage, stage_usage in ((job.usage or {}).get("stages") or {}).items():
+            totals = context_usage["stages"].setdefault(stage, {"calls": 0, "total_tokens": 0, "duration_seconds": 0.0})
+            totals["calls"] += stage_usage.get("calls", 0)
+            totals["total_tokens"] += stage_usage.get("total_tokens", 0)
+            totals["duration_seconds"] = round(totals["duration_seconds"] + stage_usage.get("duration_seconds", 0.0), 3)
+            context_usage["duration_seconds"] = round(context_usage["duration_seconds"] + stage_usage.get("duration_seconds", 0.0), 3)
+
+    return {
+        "content_id": content_id,
+        "total_tokens": sum(job.token_used or 0 for job in jobs),
+        "contexts": dict(sorted(contexts.items(), key=lambda item: item[1]["total_tokens"], reverse=True)),
+    }
+
+@router.post("/cancel/{content_id}")
+async def cancel_content_jobs(
+    content_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    user_id = str(current_user.id)
+    content = await ContentModel.get(content_id)
+    if not content or content.userId != user_id:
+        return {"error": "Content not found or access denied."}
+
+    cancelled = await cancel_jobs(content_id=content_id)
+    return {"content_id": content_id, "cancelled": cancelled}
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    user_id = str(current_user.id)
+    job = await ContentJob.get(job_id)
+    content = await ContentModel.get(job.content_id) if job else None
+    if not content or content.userId != user_id:
+        return {"error": "Job not found or access denied."}
+
+    cancelled = await cancel_jobs(job_ids=[job_id])
+    return {"job_id": job_id, "cancelled": cancelled}
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from middlewares import get_current_user
+from prompts import prompt_cache_stats
+from services.cpu_pool import cpu_pool
+from services.llm_cache import llm_cache
+from services.llm_telemetry import llm_telemetry
+
+router = APIRouter()
+
+@router.get("/llm")
+async def get_llm_metrics(current_user: dict = Depends(get_current_user)):
+    # counters are per process; the worker logs its own on every job
+    return {
+        "response_cache": llm_cache.stats(),
+        "prompt_prefix_cache": prompt_cache_stats.snapshot(),
+        "routes": llm_telemetry.snapshot(),
+    }
+
+@router.get("/cpu-pool")
+async def get_cpu_pool_metrics(current_user: dict = Depends(get_current_user)):
+    # queue time is how long a step waited for a free worker; run time is the step itself
+    return cpu_pool.stats()
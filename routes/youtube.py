@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from services.youtube import YoutubeService
 from models.youtube_validation import Extract_Youtube_Transacription, Extract_Content_From_Transcript
 from models import YTExtractionRequest
 from middlewares import get_current_user
+from utils import stream_sse_events
 
 router = APIRouter()
 
@@ -18,6 +20,15 @@ async def extract_content_from_transcript(body: Extract_Content_From_Transcript)
     content = await youtube_service.extract_content_from_transcript(body.content)
     return content
 
+@router.post("/extract-content/stream")
+async def stream_content_from_transcript(body: Extract_Content_From_Transcript):
+    youtube_service = YoutubeService()
+    return StreamingResponse(
+        stream_sse_events(youtube_service.stream_content_from_transcript(body.content)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @router.post("/extract-twitter-posts")
 async def extract_twitter_posts(body: Extract_Content_From_Transcript):
@@ -27,6 +38,17 @@ async def extract_twitter_posts(body: Extract_Content_From_Transcript):
     return twitter_posts
 
 
+@router.post("/extract-twitter-posts/stream")
+async def stream_twitter_posts(body: Extract_Content_From_Transcript):
+    count = 4
+    youtube_service = YoutubeService()
+    return StreamingResponse(
+        stream_sse_events(youtube_service.stream_twitter_posts(body.content, count)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/extraction-request")
 async def extraction_request(body: YTExtractionRequest, current_user=Depends(get_current_user)):
     youtube_service = YoutubeService()
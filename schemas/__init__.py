@@ -5,5 +5,9 @@ from .content import ContentModel
 from .social import SocialModal, SocialData
 from .content_job import ContentJob
 from .comments import CommentModel, Comment
+from .llm_cache import LlmCacheModel
+from .pipeline_node import PipelineNode
+from .job_checkpoint import JobCheckpoint
+from .llm_batch_request import LlmBatchRequest
 
-__all__ = [UserModel, BlogModel, ContentModel, SocialModal, ContentJob, CommentModel]
+__all__ = [UserModel, BlogModel, ContentModel, SocialModal, ContentJob, CommentModel, LlmCacheModel, PipelineNode, JobCheckpoint, LlmBatchRequest]
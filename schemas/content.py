@@ -10,6 +10,9 @@ class ContentModel(Document):
     userId: str
     blogs: List[BlogModel] = Field(default_factory=list)
     raw_text: Optional[str] = None
+    transcript_segments: Optional[List[dict]] = None # timed caption segments: {"text", "start", "duration"}
+    summary: Optional[str] = None # condensed transcript shared by the blog and social generators
+    summary_source_hash: Optional[str] = None # hash of the raw_text the summary was built from
     video_title: Optional[str] = None
     video_description: Optional[str] = None
     link: str
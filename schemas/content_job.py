@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List, Any
 from enums import JobStatus, JobContext
+from pymongo import IndexModel, ASCENDING, DESCENDING
 
 class ContentJob(Document):
     content_id: str
@@ -10,11 +11,24 @@ class ContentJob(Document):
     context: JobContext
     completed: bool = False
     token_used: Optional[int] = None
+    usage: Optional[dict] = None # per-stage token and latency breakdown of the LLM calls made by this job
     error: Optional[str] = None
     metadata: Optional[dict] = None # Additional metadata for the job like what was done etc
     tags: Optional[List[str]] = None
     user_id: Optional[str] = None
+    priority: int = 0 # higher is claimed first, see Settings.JOB_PRIORITIES
+    lease_owner: Optional[str] = None # worker holding the job while it is IN_PROGRESS
+    lease_expires_at: Optional[datetime] = None # renewed by heartbeats; an expired lease is re-queued
+    heartbeat_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None # when a worker last claimed the job
+    attempts: int = 0 # claims so far, including ones lost to a crashed worker
+    max_attempts: Optional[int] = None # overrides Settings.JOB_MAX_ATTEMPTS
+    next_run_at: Optional[datetime] = None # a retried job is not claimed before this
+    waiting_on: Optional[str] = None # pipeline node another worker is producing for this job, or batch results
+    woken_at: Optional[datetime] = None # when that finished; the write itself wakes the workers
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     class Settings:
         name = "content_jobs"
+        # serves the per-user head-of-queue lookup in the fair claim
+        indexes = [IndexModel([("status", ASCENDING), ("priority", DESCENDING), ("created_at", ASCENDING)])]
@@ -0,0 +1,21 @@
+from beanie import Document
+from pydantic import Field
+from datetime import datetime
+from typing import Any
+from pymongo import IndexModel, ASCENDING
+
+class JobCheckpoint(Document):
+    """An intermediate result (e.g. one chunk summary) kept so a retried job can skip it."""
+    scope: str # the job id, or the shared node the work belongs to
+    stage: str
+    key: str
+    value: Any = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "job_checkpoints"
+        indexes = [
+            IndexModel([("scope", ASCENDING), ("stage", ASCENDING), ("key", ASCENDING)], unique=True),
+            # checkpoints of jobs that never finished are dropped after a week
+            IndexModel([("created_at", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+        ]
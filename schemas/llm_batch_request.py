@@ -0,0 +1,29 @@
+from beanie import Document
+from pydantic import Field
+from datetime import datetime
+from typing import List, Optional
+from pymongo import IndexModel, ASCENDING
+from enums import JobStatus
+
+class LlmBatchRequest(Document):
+    """One chat completion sent through the batch API, kept until the jobs that need it have read it."""
+    key: str # llm_cache key of the call, so jobs making the same call share one request
+    model: str
+    messages: List[dict]
+    status: JobStatus
+    batch_id: Optional[str] = None # set once submitted, so any worker can collect the result
+    submitted_by: Optional[str] = None # worker that took the request into a submission
+    job_ids: List[str] = [] # jobs parked until this request is done
+    response: Optional[dict] = None # chat completion body
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "llm_batch_requests"
+        indexes = [
+            IndexModel([("key", ASCENDING)], unique=True),
+            IndexModel([("status", ASCENDING), ("batch_id", ASCENDING)]),
+            # batches finish within a day; leftovers nobody came back for are dropped after a week
+            IndexModel([("created_at", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+        ]
@@ -0,0 +1,16 @@
+from beanie import Document, Indexed
+from pydantic import Field
+from datetime import datetime
+from pymongo import IndexModel, ASCENDING
+
+class LlmCacheModel(Document):
+    key: Indexed(str, unique=True)
+    model: str
+    response: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+
+    class Settings:
+        name = "llm_cache"
+        # Mongo's TTL monitor drops entries once expires_at has passed
+        indexes = [IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0)]
@@ -0,0 +1,24 @@
+from beanie import Document
+from pydantic import Field
+from datetime import datetime
+from typing import Optional
+from pymongo import IndexModel, ASCENDING
+from enums import JobStatus, PipelineNodeKind
+
+class PipelineNode(Document):
+    """An upstream step shared by the jobs of one content, e.g. fetching its comments."""
+    content_id: str
+    node: PipelineNodeKind
+    status: JobStatus
+    input_hash: Optional[str] = None # the node is redone when its input changes
+    owner: Optional[str] = None # worker producing the node while IN_PROGRESS
+    lease_expires_at: Optional[datetime] = None
+    error: Optional[str] = None
+    completed_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "pipeline_nodes"
+        # one node of each kind per content; concurrent upserts race on this index
+        indexes = [IndexModel([("content_id", ASCENDING), ("node", ASCENDING)], unique=True)]
@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import logging
+from pymongo import UpdateOne
+from config import settings
+from schemas import JobCheckpoint
+
+_current_scope: ContextVar[Optional[str]] = ContextVar("checkpoint_scope", default=None)
+
+@contextmanager
+def checkpoint_scope(scope: str):
+    """Checkpoints taken inside the block, including in tasks it spawns, belong to this scope."""
+    token = _current_scope.set(scope)
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+
+class CheckpointStore:
+    """
+    Intermediate results per (scope, stage, key). Reads are loaded once per scope and stage;
+    writes are buffered and flushed every CHECKPOINT_FLUSH_SIZE entries, when a job ends and
+    when the worker shuts down.
+    """
+
+    def __init__(self, flush_size: int):
+        self.flush_size = flush_size
+        self._loaded: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._pending: Dict[Tuple[str, str, str], Any] = {}
+        self._load_lock = asyncio.Lock()
+
+    async def load(self, scope: str, stage: str) -> Dict[str, Any]:
+        async with self._load_lock:
+            if (scope, stage) not in self._loaded:
+                checkpoints = await JobCheckpoint.find(JobCheckpoint.scope == scope, JobCheckpoint.stage == stage).to_list()
+                self._loaded[(scope, stage)] = {checkpoint.key: checkpoint.value for checkpoint in checkpoints}
+                if checkpoints:
+                    logging.info(f"Resuming {stage} for {scope} from {len(checkpoints)} checkpoints")
+            return self._loaded[(scope, stage)]
+
+    async def save(self, scope: str, stage: str, key: str, value: Any):
+        self._loaded.setdefault((scope, stage), {})[key] = value
+        self._pending[(scope, stage, key)] = value
+        if len(self._pending) >= self.flush_size:
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        now = datetime.utcnow()
+        try:
+            await JobCheckpoint.get_pymongo_collection().bulk_write([
+                UpdateOne(
+                    {"scope": scope, "stage": stage, "key": key},
+                    {"$set": {"value": value}, "$setOnInsert": {"created_at": now}},
+                    upsert=True,
+                )
+                for (scope, stage, key), value in pending.items()
+            ], ordered=False)
+        except Exception as e:
+            # losing checkpoints only costs a recomputation on retry
+            logging.error(f"Failed to flush {len(pending)} checkpoints: {e}")
+
+    async def clear(self, scope: str):
+        """Drops a scope's checkpoints once the work they belong to has completed."""
+        self.forget(scope)
+        self._pending = {key: value for key, value in self._pending.items() if key[0] != scope}
+        await JobCheckpoint.find(JobCheckpoint.scope == scope).delete()
+
+    def forget(self, scope: str):
+        """Releases the in-memory copy of a scope, keeping what is stored."""
+        for key in [key for key in self._loaded if key[0] == scope]:
+            del self._loaded[key]
+
+
+checkpoint_store = CheckpointStore(flush_size=settings.CHECKPOINT_FLUSH_SIZE)
+
+
+async def checkpointed(stage: str, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Returns the checkpointed result for this key in the current scope, or computes and
+    checkpoints it. Outside a checkpoint_scope this is just compute().
+    """
+    scope = _current_scope.get()
+    if scope is None:
+        return await compute()
+    saved = await checkpoint_store.load(scope, str(stage))
+    if key in saved:
+        return saved[key]
+    value = await compute()
+    if value is not None:
+        await checkpoint_store.save(scope, str(stage), key, value)
+    return value
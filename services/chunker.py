@@ -0,0 +1,89 @@
+from typing import List
+import re
+from dataclass import TextChunk
+from .llm_service import Llm_Service
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+class TranscriptChunker:
+    """
+    Packs whole sentences, or whole caption segments when timing data is available,
+    into chunks of at most max_tokens. Consecutive chunks share up to overlap_tokens
+    worth of trailing sentences so context is not lost at the boundary.
+    """
+
+    def __init__(self, llm_service: Llm_Service, max_tokens: int, overlap_tokens: int = 0):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.llm_service = llm_service
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def chunk_text(self, text: str) -> List[TextChunk]:
+        sentences = [sentence for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+        return self._pack([TextChunk(text=sentence.strip()) for sentence in sentences])
+
+    def chunk_segments(self, segments: List[dict]) -> List[TextChunk]:
+        units = []
+        for segment in segments:
+            text = re.sub(r'\s+', ' ', segment.get("text") or "").strip()
+            if not text:
+                continue
+            start = segment.get("start")
+            end = start + segment.get("duration", 0) if start is not None else None
+            units.append(TextChunk(text=text, start=start, end=end))
+        return self._pack(units)
+
+    def _pack(self, units: List[TextChunk]) -> List[TextChunk]:
+        units, token_counts = self._split_oversized(units)
+
+        chunks = []
+        current: List[int] = []
+        current_tokens = 0
+        for index, tokens in enumerate(token_counts):
+            if current and current_tokens + tokens > self.max_tokens:
+                chunks.append(self._merge([units[i] for i in current]))
+                current, current_tokens = self._overlap_tail(current, token_counts, tokens)
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            chunks.append(self._merge([units[i] for i in current]))
+        return chunks
+
+    def _overlap_tail(self, indexes: List[int], token_counts: List[int], next_tokens: int):
+        """Trailing units of the finished chunk to repeat at the start of the next one."""
+        budget = min(self.overlap_tokens, self.max_tokens - next_tokens)
+        tail, tail_tokens = [], 0
+        for i in reversed(indexes):
+            if tail_tokens + token_counts[i] > budget:
+                break
+            tail.insert(0, i)
+            tail_tokens += token_counts[i]
+        return tail, tail_tokens
+
+    def _split_oversized(self, units: List[TextChunk]):
+        """Falls back to token windows for sentences that alone exceed max_tokens, e.g. unpunctuated captions."""
+        token_counts = self.llm_service.count_tokens_batch([unit.text for unit in units])
+        if all(tokens <= self.max_tokens for tokens in token_counts):
+            return units, token_counts
+
+        split_units, split_counts = [], []
+        for unit, tokens in zip(units, token_counts):
+            if tokens <= self.max_tokens:
+                split_units.append(unit)
+                split_counts.append(tokens)
+                continue
+            pieces = self.llm_service.split_text_into_token_chunks(unit.text, max_tokens=self.max_tokens, overlap=0)
+            split_units.extend(TextChunk(text=piece, start=unit.start, end=unit.end) for piece in pieces)
+            split_counts.extend(self.llm_service.count_tokens_batch(pieces))
+        return split_units, split_counts
+
+    def _merge(self, units: List[TextChunk]) -> TextChunk:
+        starts = [unit.start for unit in units if unit.start is not None]
+        ends = [unit.end for unit in units if unit.end is not None]
+        return TextChunk(
+            text=" ".join(unit.text for unit in units),
+            start=min(starts) if starts else None,
+            end=max(ends) if ends else None,
+        )
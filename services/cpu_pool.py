@@ -0,0 +1,104 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import functools
+import multiprocessing
+import time
+from config import settings
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> tuple:
+    # wall clock, since perf_counter is not comparable across processes
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+
+class TaskStats:
+    def __init__(self):
+        self.calls = 0
+        self.queue_seconds = 0.0
+        self.run_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.max_run_seconds = 0.0
+
+    def record(self, queued: float, ran: float):
+        self.calls += 1
+        self.queue_seconds += queued
+        self.run_seconds += ran
+        self.max_queue_seconds = max(self.max_queue_seconds, queued)
+        self.max_run_seconds = max(self.max_run_seconds, ran)
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "avg_queue_ms": 1000 * self.queue_seconds / self.calls if self.calls else 0.0,
+            "max_queue_ms": 1000 * self.max_queue_seconds,
+            "avg_run_ms": 1000 * self.run_seconds / self.calls if self.calls else 0.0,
+            "max_run_ms": 1000 * self.max_run_seconds,
+        }
+
+
+class CpuPool:
+    """
+    Keeps CPU-heavy and blocking work off the event loop. Pure-Python work (regex over a whole
+    transcript) goes to a process pool; work that releases the GIL (tiktoken, blocking I/O,
+    ffmpeg via pydub) goes to a thread pool. Queue and run times are recorded per task name.
+    """
+
+    def __init__(self, processes: int, threads: int):
+        self.processes = processes
+        self.threads = threads
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self.tasks: Dict[str, TaskStats] = {}
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            # spawn rather than fork: the parent has an event loop and client threads running
+            self._process_pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        return self._process_pool
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix="cpu-pool")
+        return self._thread_pool
+
+    async def run_in_process(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        """fn and its arguments must be picklable, i.e. module-level functions and plain data."""
+        return await self._run(self.process_pool, name, fn, args, kwargs)
+
+    async def run_in_thread(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        return await self._run(self.thread_pool, name, fn, args, kwargs)
+
+    async def _run(self, executor: Executor, name: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        submitted = time.time()
+        result, started, finished = await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(_timed_call, fn, args, kwargs)
+        )
+        self.tasks.setdefault(name, TaskStats()).record(max(0.0, started - submitted), finished - started)
+        return result
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: stats.to_dict() for name, stats in sorted(self.tasks.items())}
+
+    def shutdown(self):
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+
+
+cpu_pool = CpuPool(processes=settings.CPU_POOL_PROCESSES, threads=settings.CPU_POOL_THREADS)
+
+
+async def normalize_whitespace_offloaded(text: str) -> str:
+    """normalize_whitespace, run in the process pool once the text is large enough to be worth shipping."""
+    from utils import normalize_whitespace
+    if len(text or "") < settings.CPU_POOL_MIN_CHARS:
+        return normalize_whitespace(text)
+    return await cpu_pool.run_in_process("normalize_whitespace", normalize_whitespace, text)
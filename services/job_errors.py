@@ -0,0 +1,40 @@
+import asyncio
+import httpx
+import requests
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from pymongo.errors import AutoReconnect, NetworkTimeout
+from .llm_batch import BatchFailedError
+from .youtube_data_client import YoutubeQuotaExceeded
+
+class IncompleteResponseError(Exception):
+    """The model answered but left out part of what was asked, e.g. one platform of a fused call."""
+
+
+# failures that can pass on their own: timeouts, dropped connections, rate limits and 5xx
+RETRYABLE_JOB_ERRORS = (
+    APITimeoutError,
+    APIConnectionError,
+    RateLimitError,
+    InternalServerError,
+    BatchFailedError,
+    IncompleteResponseError,
+    YoutubeQuotaExceeded,
+    httpx.TransportError,
+    requests.ConnectionError,
+    requests.Timeout,
+    asyncio.TimeoutError,
+    AutoReconnect,
+    NetworkTimeout,
+)
+
+
+def is_retryable_job_error(error: BaseException) -> bool:
+    """
+    Whether a job that failed with this error is worth running again. Anything not known to
+    be transient is fatal, so bad input or a bug fails once instead of burning every attempt.
+    """
+    if isinstance(error, RETRYABLE_JOB_ERRORS):
+        return True
+    if isinstance(error, (requests.HTTPError, httpx.HTTPStatusError)) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
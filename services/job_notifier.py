@@ -0,0 +1,109 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+import asyncio
+import inspect
+import logging
+from config import settings
+from schemas import ContentJob
+
+
+class JobNotifier(ABC):
+    """
+    Wakes idle worker slots as soon as a job is queued. A slot takes the current signal
+    with listen() before it looks at the queue, so a job queued in between still wakes it.
+    """
+
+    def __init__(self):
+        self._signal = asyncio.Event()
+
+    def listen(self) -> asyncio.Event:
+        return self._signal
+
+    def notify(self):
+        signal, self._signal = self._signal, asyncio.Event()
+        signal.set()
+
+    async def wait(self, signal: asyncio.Event, timeout: float) -> bool:
+        """Returns True when woken by a new job, False when the timeout ran out."""
+        try:
+            await asyncio.wait_for(signal.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @abstractmethod
+    async def publish(self):
+        """Called by whoever queued a job."""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class LocalJobNotifier(JobNotifier):
+    """In-process notifications, for running the API and worker together and for tests."""
+
+    async def publish(self):
+        self.notify()
+
+
+class ChangeStreamJobNotifier(JobNotifier):
+    """
+    Watches content_jobs for inserts, re-queues and jobs woken by a finished pipeline node
+    (woken_at set), so the database write itself is the notification and publish() has
+    nothing to do. Change streams need a replica set; without one the watcher logs the
+    error, retries later and the workers' polling carries on.
+    """
+
+    PIPELINE = [{"$match": {"$or": [
+        {"operationType": "insert"},
+        {"operationType": "update", "updateDescription.updatedFields.status": "pending"},
+        {"operationType": "update", "updateDescription.updatedFields.woken_at": {"$exists": True}},
+    ]}}]
+
+    def __init__(self):
+        super().__init__()
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self):
+        pass
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _watch(self):
+        while True:
+            try:
+                stream = ContentJob.get_pymongo_collection().watch(self.PIPELINE)
+                # motor returns the stream directly, the pymongo async client a coroutine
+                if inspect.isawaitable(stream):
+                    stream = await stream
+                async with stream:
+                    logging.info("Watching content_jobs for new jobs.")
+                    async for _ in stream:
+                        self.notify()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Job change stream failed, falling back to polling: {e}")
+                await asyncio.sleep(settings.WORKER_IDLE_MAX_SECONDS)
+
+
+_job_notifier: Optional[JobNotifier] = None
+
+def get_job_notifier() -> JobNotifier:
+    global _job_notifier
+    if _job_notifier is None:
+        if settings.JOB_NOTIFIER == "local":
+            _job_notifier = LocalJobNotifier()
+        else:
+            _job_notifier = ChangeStreamJobNotifier()
+    return _job_notifier
@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import random
+from config import settings
+from enums import JobContext, JobStatus
+from schemas import ContentJob
+from beanie import PydanticObjectId
+from beanie.operators import In
+
+
+def job_priority(context: JobContext) -> int:
+    return settings.JOB_PRIORITIES.get(str(context), 0)
+
+
+def user_weight(user_id: Optional[str]) -> float:
+    return settings.JOB_USER_WEIGHTS.get(str(user_id), 1.0)
+
+
+def job_max_attempts(content_job: ContentJob) -> int:
+    return content_job.max_attempts or settings.JOB_MAX_ATTEMPTS
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff after the given number of attempts, with jitter so retries spread out."""
+    delay = min(settings.JOB_RETRY_MAX_SECONDS, settings.JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+async def redrive_dead_letter_jobs(
+    job_ids: Optional[List[str]] = None,
+    context: Optional[JobContext] = None,
+    user_id: Optional[str] = None,
+) -> int:
+    """Puts dead-lettered jobs back in the queue with a fresh set of attempts."""
+    filters = [ContentJob.status == JobStatus.DEAD_LETTER]
+    if job_ids:
+        filters.append(In(ContentJob.id, [PydanticObjectId(job_id) for job_id in job_ids]))
+    if context:
+        filters.append(ContentJob.context == context)
+    if user_id:
+        filters.append(ContentJob.user_id == user_id)
+    result = await ContentJob.find(*filters).update({"$set": {
+        "status": JobStatus.PENDING,
+        "attempts": 0,
+        "next_run_at": None,
+        "updated_at": datetime.utcnow(),
+    }})
+    return result.modified_count if result else 0
+
+
+async def cancel_jobs(job_ids: Optional[List[str]] = None, content_id: Optional[str] = None) -> int:
+    """
+    Cancels pending and running jobs. Pending ones are never claimed; running ones are
+    stopped by the worker holding their lease the next time it polls for cancellations.
+    """
+    filters = [In(ContentJob.status, [JobStatus.PENDING, JobStatus.IN_PROGRESS])]
+    if job_ids:
+        filters.append(In(ContentJob.id, [PydanticObjectId(job_id) for job_id in job_ids]))
+    if content_id:
+        filters.append(ContentJob.content_id == content_id)
+    result = await ContentJob.find(*filters).update({"$set": {
+        "status": JobStatus.CANCELLED,
+        "next_run_at": None,
+        "waiting_on": None,
+        "updated_at": datetime.utcnow(),
+    }})
+    return result.modified_count if result else 0
+
+
+async def running_jobs_by_user() -> Dict[Optional[str], int]:
+    rows = await ContentJob.aggregate([
+        {"$match": {"status": JobStatus.IN_PROGRESS.value}},
+        {"$group": {"_id": "$user_id", "running": {"$sum": 1}}},
+    ]).to_list()
+    return {row["_id"]: row["running"] for row in rows}
+
+
+async def next_job_candidates() -> List[dict]:
+    """
+    Pending jobs in the order they should be claimed, at most one per user.
+
+    Each user's head is their highest-priority, oldest pending job. Heads are ordered by
+    priority class and, within a class, by the user's running jobs divided by their weight,
+    so a user with fifty queued videos gets a fair share of slots rather than all of them.
+    Age only breaks ties between equal shares.
+
+    Aging works across classes only: a class rises one point per JOB_PRIORITY_AGING_SECONDS
+    its oldest head has waited and joins a higher class once it reaches it, so bulk work is
+    not starved forever. Within a class an old backlog never outranks another user's head.
+    """
+    heads = await ContentJob.aggregate([
+        {"$match": {
+            "status": JobStatus.PENDING.value,
+            "completed": False,
+            "$or": [{"next_run_at": None}, {"next_run_at": {"$lte": datetime.utcnow()}}],
+        }},
+        {"$sort": {"priority": -1, "created_at": 1}},
+        {"$group": {"_id": "$user_id", "job_id": {"$first": "$_id"}, "priority": {"$first": "$priority"}, "created_at": {"$first": "$created_at"}}},
+    ]).to_list()
+    if not heads:
+        return []
+    running = await running_jobs_by_user()
+    now = datetime.utcnow()
+
+    oldest_wait: Dict[int, float] = {}
+    for head in heads:
+        priority = head.get("priority") or 0
+        oldest_wait[priority] = max(oldest_wait.get(priority, 0.0), (now - head["created_at"]).total_seconds())
+    aged_class = {
+        priority: max(c for c in oldest_wait if c <= priority + waited / settings.JOB_PRIORITY_AGING_SECONDS)
+        for priority, waited in oldest_wait.items()
+    }
+
+    def claim_order(head: dict):
+        share = running.get(head["_id"], 0) / user_weight(head["_id"])
+        return (-aged_class[head.get("priority") or 0], share, head["created_at"])
+
+    return sorted(heads, key=claim_order)
+
+
+async def queue_stats(window: timedelta = timedelta(hours=1)) -> dict:
+    """Queue depth and wait times per user and per context."""
+    now = datetime.utcnow()
+    stats = {}
+    for key in ("user_id", "context"):
+        pending = await ContentJob.aggregate([
+            {"$match": {"status": {"$in": [JobStatus.PENDING.value, JobStatus.IN_PROGRESS.value]}}},
+            {"$group": {
+                "_id": f"${key}",
+                "pending": {"$sum": {"$cond": [{"$eq": ["$status", JobStatus.PENDING.value]}, 1, 0]}},
+                "in_progress": {"$sum": {"$cond": [{"$eq": ["$status", JobStatus.IN_PROGRESS.value]}, 1, 0]}},
+                "oldest_pending": {"$min": {"$cond": [{"$eq": ["$status", JobStatus.PENDING.value]}, "$created_at", None]}},
+            }},
+        ]).to_list()
+        started = await ContentJob.aggregate([
+            {"$match": {"started_at": {"$gte": now - window}}},
+            {"$project": {key: 1, "wait_ms": {"$subtract": ["$started_at", "$created_at"]}}},
+            {"$group": {
+                "_id": f"${key}",
+                "started": {"$sum": 1},
+                "avg_wait_ms": {"$avg": "$wait_ms"},
+                "max_wait_ms": {"$max": "$wait_ms"},
+            }},
+        ]).to_list()
+
+        groups: Dict[str, dict] = {}
+        for row in pending:
+            oldest = row.pop("oldest_pending")
+            groups[str(row.pop("_id"))] = {
+                **row,
+                "oldest_pending_seconds": (now - oldest).total_seconds() if oldest else None,
+            }
+        for row in started:
+            group = groups.setdefault(str(row.pop("_id")), {"pending": 0, "in_progress": 0, "oldest_pending_seconds": None})
+            group["started_last_window"] = row["started"]
+            group["avg_wait_seconds"] = row["avg_wait_ms"] / 1000
+            group["max_wait_seconds"] = row["max_wait_ms"] / 1000
+        stats[f"by_{key}"] = groups
+    stats["window_seconds"] = window.total_seconds()
+    return stats
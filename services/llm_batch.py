@@ -0,0 +1,310 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, List, Optional
+import asyncio
+import json
+import logging
+import os
+import uuid
+from beanie import PydanticObjectId
+from beanie.operators import In
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from enums import JobStatus
+from schemas import ContentJob, LlmBatchRequest
+from .job_notifier import get_job_notifier
+
+# what a job parked on batch results has in ContentJob.waiting_on
+BATCH_RESULTS = "llm_batch"
+
+
+class BatchFailedError(Exception):
+    pass
+
+
+class BatchResultPending(Exception):
+    """Raised when a job needs completions that are queued for, or running in, a batch."""
+
+    def __init__(self, keys: List[str]):
+        super().__init__(f"{len(keys)} LLM requests are waiting on the batch API")
+        self.keys = keys
+
+
+class BatchBackend(ABC):
+    """
+    Submits a JSONL file of chat completion requests and later returns the output lines.
+    Output lines follow the OpenAI batch format: {"custom_id", "response": {"status_code", "body"}, "error"}.
+    """
+
+    @abstractmethod
+    async def submit(self, jsonl: str) -> str:
+        """Submits the requests and returns the batch id."""
+
+    @abstractmethod
+    async def poll(self, batch_id: str) -> Optional[List[dict]]:
+        """Returns the output lines once the batch has finished, None while it is still running."""
+
+
+class OpenAIBatchBackend(BatchBackend):
+    def __init__(self, client):
+        self.client = client
+
+    async def submit(self, jsonl: str) -> str:
+        input_file = await self.client.files.create(
+            file=("batch.jsonl", jsonl.encode("utf-8")),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    async def poll(self, batch_id: str) -> Optional[List[dict]]:
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise BatchFailedError(f"Batch {batch_id} ended with status {batch.status}")
+        if batch.status != "completed":
+            return None
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await self.client.files.content(file_id)
+                lines.extend(json.loads(line) for line in content.text.splitlines() if line.strip())
+        return lines
+
+
+class LocalFileBatchBackend(BatchBackend):
+    """
+    File-based stand-in for the batch API. Requests are written to <id>.input.jsonl and
+    the batch completes once something writes <id>.output.jsonl next to it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    async def submit(self, jsonl: str) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        with open(os.path.join(self.directory, f"{batch_id}.input.jsonl"), "w", encoding="utf-8") as f:
+            f.write(jsonl)
+        return batch_id
+
+    async def poll(self, batch_id: str) -> Optional[List[dict]]:
+        output_path = os.path.join(self.directory, f"{batch_id}.output.jsonl")
+        if not os.path.exists(output_path):
+            return None
+        with open(output_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+async def request_batch_completion(key: str, model: str, messages: List[dict]) -> dict:
+    """
+    Returns the chat completion body for this call once its batch has it. Until then the
+    call is queued (once across all jobs and workers) and BatchResultPending is raised, so
+    the job can be parked instead of holding a worker slot for the whole batch window.
+    """
+    request = await LlmBatchRequest.find_one(LlmBatchRequest.key == key)
+    if request is None:
+        try:
+            await LlmBatchRequest(key=key, model=model, messages=messages, status=JobStatus.PENDING).insert()
+        except DuplicateKeyError:
+            pass # another job queued the same call first
+        raise BatchResultPending([key])
+    if request.status == JobStatus.COMPLETED:
+        return request.response or {}
+    if request.status == JobStatus.FAILED:
+        # queued again for the job's retry
+        await LlmBatchRequest.find_one(LlmBatchRequest.id == request.id, LlmBatchRequest.status == JobStatus.FAILED).update({"$set": {
+            "status": JobStatus.PENDING, "batch_id": None, "submitted_by": None, "error": None, "updated_at": datetime.utcnow(),
+        }})
+        raise BatchFailedError(request.error or f"Batch request {key} failed")
+    raise BatchResultPending([key])
+
+
+async def gather_batched(*calls: Awaitable) -> List[Any]:
+    """
+    asyncio.gather that lets every call queue its batch request before giving up, so a job
+    fanning out many calls is parked once for all of them rather than once per call.
+    """
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    keys = [key for result in results if isinstance(result, BatchResultPending) for key in result.keys]
+    if keys:
+        raise BatchResultPending(keys)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return list(results)
+
+
+async def watch_batch_requests(job_id: str, keys: List[str]):
+    """
+    Registers a parked job on the requests it waits for. A request that finished before the
+    job was registered would never wake it, so in that case the job is woken here.
+    """
+    await LlmBatchRequest.find(In(LlmBatchRequest.key, keys)).update({"$addToSet": {"job_ids": job_id}})
+    done = await LlmBatchRequest.find(
+        In(LlmBatchRequest.key, keys),
+        In(LlmBatchRequest.status, [JobStatus.COMPLETED, JobStatus.FAILED]),
+    ).count()
+    if done:
+        await wake_batch_jobs([job_id])
+
+
+async def wake_batch_jobs(job_ids: List[str]):
+    """Makes jobs parked on batch results claimable right away; woken_at is what the notifier sees."""
+    if not job_ids:
+        return
+    now = datetime.utcnow()
+    result = await ContentJob.find(
+        In(ContentJob.id, [PydanticObjectId(job_id) for job_id in job_ids]),
+        ContentJob.status == JobStatus.PENDING,
+        ContentJob.waiting_on == BATCH_RESULTS,
+    ).update({"$set": {"next_run_at": None, "waiting_on": None, "woken_at": now, "updated_at": now}})
+    if result and result.modified_count:
+        logging.info(f"Batch results are in, waking {result.modified_count} jobs")
+        await get_job_notifier().publish()
+
+
+class BatchDispatcher:
+    """
+    Submits queued LlmBatchRequests in batches and collects the results. Every request keeps
+    the id of the batch it went out in, so results are collected by whichever worker polls
+    next, even if the one that submitted it has restarted.
+    """
+
+    def __init__(self, backend: BatchBackend, owner: str, max_size: int, flush_interval: float, poll_interval: float):
+        self.backend = backend
+        self.owner = owner
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+
+    async def run_submissions(self):
+        while True:
+            try:
+                await self.requeue_unsubmitted()
+                while await self.submit_pending():
+                    pass
+            except Exception as e:
+                logging.error(f"Batch submission failed: {e}")
+            await asyncio.sleep(self.flush_interval)
+
+    async def run_polling(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll_submitted()
+            except Exception as e:
+                logging.error(f"Batch polling failed: {e}")
+
+    async def requeue_unsubmitted(self):
+        """Returns requests taken by a worker that died before it recorded the batch id."""
+        stale = datetime.utcnow() - timedelta(seconds=settings.WORKER_LEASE_SECONDS)
+        await LlmBatchRequest.find(
+            LlmBatchRequest.status == JobStatus.IN_PROGRESS,
+            LlmBatchRequest.batch_id == None,
+            LlmBatchRequest.updated_at < stale,
+        ).update({"$set": {"status": JobStatus.PENDING, "submitted_by": None, "updated_at": datetime.utcnow()}})
+
+    async def submit_pending(self) -> bool:
+        """Submits up to max_size queued requests as one batch. Returns False when none were queued."""
+        queued = await LlmBatchRequest.find(LlmBatchRequest.status == JobStatus.PENDING).sort(
+            "created_at"
+        ).limit(self.max_size).to_list()
+        if not queued:
+            return False
+        ids = [request.id for request in queued]
+        # conditional on PENDING, so a request taken by another worker meanwhile is not sent twice
+        await LlmBatchRequest.find(In(LlmBatchRequest.id, ids), LlmBatchRequest.status == JobStatus.PENDING).update({"$set": {
+            "status": JobStatus.IN_PROGRESS, "submitted_by": self.owner, "updated_at": datetime.utcnow(),
+        }})
+        requests = await LlmBatchRequest.find(
+            In(LlmBatchRequest.id, ids),
+            LlmBatchRequest.status == JobStatus.IN_PROGRESS,
+            LlmBatchRequest.submitted_by == self.owner,
+            LlmBatchRequest.batch_id == None,
+        ).to_list()
+        if not requests:
+            return True
+        claimed = In(LlmBatchRequest.id, [request.id for request in requests])
+        lines = [
+            json.dumps({
+                "custom_id": str(request.id),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": request.model, "messages": request.messages},
+            })
+            for request in requests
+        ]
+        try:
+            batch_id = await self.backend.submit("\n".join(lines) + "\n")
+        except Exception:
+            await LlmBatchRequest.find(claimed).update({"$set": {"status": JobStatus.PENDING, "submitted_by": None}})
+            raise
+        await LlmBatchRequest.find(claimed).update({"$set": {"batch_id": batch_id, "updated_at": datetime.utcnow()}})
+        logging.info(f"Submitted batch {batch_id} with {len(requests)} requests")
+        return True
+
+    async def poll_submitted(self):
+        batch_ids = await LlmBatchRequest.distinct(
+            "batch_id", {"status": str(JobStatus.IN_PROGRESS), "batch_id": {"$ne": None}}
+        )
+        for batch_id in batch_ids:
+            try:
+                lines = await self.backend.poll(batch_id)
+            except BatchFailedError as e:
+                logging.error(str(e))
+                await self.finish_batch(batch_id, [], str(e))
+                continue
+            except Exception as e:
+                logging.error(f"Could not poll batch {batch_id}: {e}")
+                continue
+            if lines is not None:
+                logging.info(f"Batch {batch_id} completed with {len(lines)} results")
+                await self.finish_batch(batch_id, lines, f"No result in batch {batch_id}")
+
+    async def finish_batch(self, batch_id: str, lines: List[dict], missing_error: str):
+        """Stores each request's result, fails the ones without one and wakes the jobs waiting on them."""
+        now = datetime.utcnow()
+        in_batch = {"batch_id": batch_id, "status": str(JobStatus.IN_PROGRESS)}
+        updates = []
+        for line in lines:
+            try:
+                request_id = PydanticObjectId(line.get("custom_id"))
+            except Exception:
+                continue
+            response = line.get("response") or {}
+            if response.get("status_code") == 200:
+                result = {"status": str(JobStatus.COMPLETED), "response": response.get("body") or {}}
+            else:
+                result = {"status": str(JobStatus.FAILED), "error": json.dumps(line.get("error") or response)}
+            updates.append(UpdateOne({"_id": request_id, **in_batch}, {"$set": {**result, "updated_at": now}}))
+        if updates:
+            await LlmBatchRequest.get_pymongo_collection().bulk_write(updates, ordered=False)
+        await LlmBatchRequest.find(in_batch).update({"$set": {
+            "status": JobStatus.FAILED, "error": missing_error, "updated_at": now,
+        }})
+        # read after the results are stored: a job registering later sees them in watch_batch_requests
+        await wake_batch_jobs(await LlmBatchRequest.distinct("job_ids", {"batch_id": batch_id}))
+
+
+_batch_dispatcher: Optional[BatchDispatcher] = None
+
+def get_batch_dispatcher(client, owner: str) -> BatchDispatcher:
+    global _batch_dispatcher
+    if _batch_dispatcher is None:
+        if settings.LLM_BATCH_BACKEND == "local":
+            backend = LocalFileBatchBackend(settings.LLM_BATCH_LOCAL_DIR)
+        else:
+            backend = OpenAIBatchBackend(client)
+        _batch_dispatcher = BatchDispatcher(
+            backend,
+            owner=owner,
+            max_size=settings.LLM_BATCH_MAX_SIZE,
+            flush_interval=settings.LLM_BATCH_FLUSH_SECONDS,
+            poll_interval=settings.LLM_BATCH_POLL_SECONDS,
+        )
+    return _batch_dispatcher
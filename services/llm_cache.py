@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+import hashlib
+import logging
+import time
+from schemas import LlmCacheModel
+from config import settings
+
+
+class LlmCache:
+    """
+    Two-tier cache for LLM responses keyed by a hash of (model, system prompt, user prompt).
+    Lookups hit an in-process LRU first and fall back to the Mongo collection.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, system_prompt, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            del self._entries[key]
+
+        try:
+            cached = await LlmCacheModel.find_one(LlmCacheModel.key == key)
+        except Exception as e:
+            logging.warning(f"LLM cache lookup failed: {e}")
+            cached = None
+        # The TTL monitor only runs once a minute, so expiry is re-checked here
+        if cached and cached.expires_at > datetime.utcnow():
+            self._remember(key, cached.response)
+            self.mongo_hits += 1
+            return cached.response
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, model: str, value: str):
+        self._remember(key, value)
+        try:
+            await LlmCacheModel.find_one(LlmCacheModel.key == key).upsert(
+                {"$set": {
+                    "response": value,
+                    "model": model,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+                }},
+                on_insert=LlmCacheModel(
+                    key=key,
+                    model=model,
+                    response=value,
+                    expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+                ),
+            )
+        except Exception as e:
+            logging.warning(f"LLM cache write failed: {e}")
+
+    def _remember(self, key: str, value: str):
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.mongo_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.mongo_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._entries),
+        }
+
+
+llm_cache = LlmCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+)
@@ -1,43 +1,316 @@
-from openai import OpenAI
-import tiktoken
+from typing import Any, AsyncIterator, List, Optional, Tuple, Union
+import asyncio
+import json
+import logging
+import random
+import time
+import httpx
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, InternalServerError, RateLimitError
 from config import settings
+from dataclass import Prompt, TokenizedText
+from enums import LlmStage
+from prompts import get_json_repair_prompt
+from prompts.registry import prompt_cache_stats
+from utils import parse_json
+from .cpu_pool import cpu_pool
+from .llm_batch import request_batch_completion
+from .llm_cache import llm_cache
+from .llm_telemetry import llm_telemetry
+from .model_router import get_job_context
+from .rate_limiter import rate_limiter
+from .tokenizer import Tokenizer
+from .usage_tracker import record_llm_usage
+
+DEFAULT_SYSTEM_PROMPT = "Summarize the following text."
+
+# errors worth another attempt; anything else (bad request, auth) fails the same way every time
+RETRYABLE_ERRORS = (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError)
+
+_client: Optional[AsyncOpenAI] = None
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Returns the process-wide async OpenAI client, creating it on first use.
+    The underlying httpx pool keeps connections alive between LLM calls.
+    """
+    global _client
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+            )
+        )
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=http_client,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            # retries are handled per call in Llm_Service so they can be logged and hedged
+            max_retries=0,
+        )
+    return _client
+
+async def close_openai_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
 
 class Llm_Service:
 
-    def __init__(self, model: str):
+    def __init__(self, model: str, batch: bool = False):
         self.model = model
-        if model == "gpt-4o":
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        pass
-
-    async def extract_data_from_llm(self, text: str, system_prompt = None):
-        required_system_prompt = "Summarize the following text."
-        if system_prompt:
-            required_system_prompt = system_prompt
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": required_system_prompt},
-                {"role": "user", "content": text}
-            ]
+        self.batch = batch
+        self.client = get_openai_client()
+
+    async def extract_data_from_llm(self, text: Union[str, Prompt], system_prompt = None, use_cache: bool = True, stage: Optional[LlmStage] = None):
+        content, cache_key = await self._extract(text, system_prompt, use_cache, stage)
+        if cache_key and content is not None:
+            await llm_cache.set(cache_key, self.model, content)
+        return content
+
+    async def extract_json_from_llm(self, text: Union[str, Prompt], system_prompt = None, use_cache: bool = True, stage: Optional[LlmStage] = None) -> Any:
+        """
+        extract_data_from_llm for prompts that ask for JSON, returning the parsed value.
+        Only output that parsed is cached, re-serialized, so a broken completion is never
+        handed back to the next attempt.
+        """
+        content, cache_key = await self._extract(text, system_prompt, use_cache, stage)
+        value = await self.parse_json_response(content)
+        if cache_key:
+            await llm_cache.set(cache_key, self.model, json.dumps(value))
+        return value
+
+    async def _extract(self, text: Union[str, Prompt], system_prompt: Optional[str], use_cache: bool, stage: Optional[LlmStage]) -> Tuple[Optional[str], Optional[str]]:
+        """Returns the completion and, when it came from the model and should be cached, its cache key."""
+        prompt_name, required_system_prompt, text = self._resolve_prompt(text, system_prompt)
+        started = time.perf_counter()
+
+        use_cache = use_cache and settings.LLM_CACHE_ENABLED
+        cache_key = None
+        if use_cache:
+            cache_key = llm_cache.make_key(self.model, required_system_prompt, text)
+            cached = await llm_cache.get(cache_key)
+            if cached is not None:
+                self._record_cached_hit(stage, time.perf_counter() - started)
+                return cached, None
+
+        if self.batch:
+            content, usage = await self._complete_in_batch(required_system_prompt, text)
+        else:
+            content, usage = await self._complete_with_retries(required_system_prompt, text, stage)
+        self._record_usage(stage, prompt_name, usage, time.perf_counter() - started)
+        return content, cache_key
+
+    async def parse_json_response(self, content: str) -> Any:
+        """
+        Parses a completion as JSON. Malformed output is repaired locally first and then,
+        up to LLM_JSON_REPAIR_ATTEMPTS times, by asking the model to fix it, so a finished
+        generation is not thrown away over a stray comma or a truncated closing bracket.
+        """
+        attempt = 0
+        while True:
+            try:
+                return parse_json(content)
+            except json.JSONDecodeError as e:
+                if attempt >= settings.LLM_JSON_REPAIR_ATTEMPTS:
+                    raise
+                attempt += 1
+                logging.warning(f"Unparseable JSON from {self.model} ({e}), asking for a repair (attempt {attempt})")
+                content = await self.extract_data_from_llm(
+                    get_json_repair_prompt(content, str(e)), use_cache=False, stage=LlmStage.JSON_REPAIR
+                )
+
+    async def _complete_with_retries(self, system_prompt: str, text: str, stage: Optional[LlmStage]) -> Tuple[Optional[str], dict]:
+        attempt = 0
+        while True:
+            try:
+                return await self._complete_hedged(system_prompt, text, stage)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= settings.LLM_MAX_RETRIES:
+                    raise
+                attempt += 1
+                # full jitter keeps workers that failed together from retrying together
+                delay = random.uniform(0, min(
+                    settings.LLM_RETRY_MAX_DELAY_SECONDS,
+                    settings.LLM_RETRY_BASE_DELAY_SECONDS * 2 ** attempt,
+                ))
+                logging.warning(f"{stage} call to {self.model} failed with {type(e).__name__}, retry {attempt}/{settings.LLM_MAX_RETRIES} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _complete_hedged(self, system_prompt: str, text: str, stage: Optional[LlmStage]) -> Tuple[Optional[str], dict]:
+        """
+        Runs _complete, and if it is still going after the route's p95 latency starts a
+        duplicate. The first successful response wins and the other request is cancelled.
+        """
+        hedge_after = None
+        if settings.LLM_HEDGE_ENABLED:
+            hedge_after = llm_telemetry.latency_percentile(
+                get_job_context(), stage, self.model, 0.95, settings.LLM_HEDGE_MIN_SAMPLES
+            )
+        if hedge_after is None:
+            return await self._complete(system_prompt, text)
+
+        pending = {asyncio.create_task(self._complete(system_prompt, text))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return done.pop().result()
+            logging.info(f"{stage} call to {self.model} passed p95 ({hedge_after:.2f}s), sending hedged request")
+            pending.add(asyncio.create_task(self._complete(system_prompt, text)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _complete(self, system_prompt: str, text: str) -> Tuple[Optional[str], dict]:
+        limiter, estimated_tokens = await self._acquire_rate_limit(system_prompt, text)
+        try:
+            raw_response = await self.client.chat.completions.with_raw_response.create(
+                model=self.model,
+                messages=self._build_messages(system_prompt, text)
+            )
+        except RateLimitError as e:
+            limiter.pause(e.response.headers)
+            raise
+        limiter.update_from_headers(raw_response.headers)
+        response = raw_response.parse()
+        usage = response.usage.model_dump() if response.usage else {}
+        limiter.reconcile(estimated_tokens, usage.get("total_tokens"))
+        return response.choices[0].message.content, usage
+
+    async def _complete_in_batch(self, system_prompt: str, text: str) -> Tuple[Optional[str], dict]:
+        # batch submissions have their own quota, so the interactive limiter is skipped
+        body = await request_batch_completion(
+            llm_cache.make_key(self.model, system_prompt, text),
+            self.model,
+            self._build_messages(system_prompt, text),
         )
-        return response.choices[0].message.content
-    
+        return body["choices"][0]["message"]["content"], body.get("usage") or {}
+
+    async def stream_data_from_llm(self, text: Union[str, Prompt], system_prompt = None, use_cache: bool = True, stage: Optional[LlmStage] = None, json_output: bool = False) -> AsyncIterator[str]:
+        """
+        Yields the completion as content deltas while the model generates it.
+        A cached completion is yielded as a single delta. With json_output, a completion
+        is only cached once it parses, possibly after local repair.
+        """
+        prompt_name, required_system_prompt, text = self._resolve_prompt(text, system_prompt)
+        started = time.perf_counter()
+
+        use_cache = use_cache and settings.LLM_CACHE_ENABLED
+        if use_cache:
+            cache_key = llm_cache.make_key(self.model, required_system_prompt, text)
+            cached = await llm_cache.get(cache_key)
+            if cached is not None:
+                self._record_cached_hit(stage, time.perf_counter() - started)
+                yield cached
+                return
+
+        limiter, estimated_tokens = await self._acquire_rate_limit(required_system_prompt, text)
+        try:
+            raw_response = await self.client.chat.completions.with_raw_response.create(
+                model=self.model,
+                messages=self._build_messages(required_system_prompt, text),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        except RateLimitError as e:
+            limiter.pause(e.response.headers)
+            raise
+        limiter.update_from_headers(raw_response.headers)
+
+        parts = []
+        async for chunk in raw_response.parse():
+            if chunk.usage:
+                limiter.reconcile(estimated_tokens, chunk.usage.total_tokens)
+                self._record_usage(stage, prompt_name, chunk.usage.model_dump(), time.perf_counter() - started)
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+
+        if use_cache and parts:
+            content = "".join(parts)
+            if json_output:
+                try:
+                    content = json.dumps(parse_json(content))
+                except json.JSONDecodeError:
+                    logging.warning(f"Not caching unparseable JSON stream from {self.model}")
+                    return
+            await llm_cache.set(cache_key, self.model, content)
+
+    def _resolve_prompt(self, text: Union[str, Prompt], system_prompt: Optional[str]) -> Tuple[Optional[str], str, str]:
+        """Returns (template name, system message, user message) for a raw string or a registered Prompt."""
+        if isinstance(text, Prompt):
+            return text.name, text.system, text.user
+        return None, system_prompt or DEFAULT_SYSTEM_PROMPT, text
+
+    def _record_usage(self, stage: Optional[LlmStage], prompt_name: Optional[str], usage: dict, duration: float):
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        record_llm_usage(stage, prompt_tokens, completion_tokens, duration, cached_prompt_tokens=cached_tokens)
+        llm_telemetry.record(get_job_context(), stage, self.model, duration, prompt_tokens, completion_tokens)
+        if prompt_name:
+            prompt_cache_stats.record(prompt_name, prompt_tokens, cached_tokens)
+
+    def _record_cached_hit(self, stage: Optional[LlmStage], duration: float):
+        record_llm_usage(stage, 0, 0, duration, cached=True)
+        llm_telemetry.record(get_job_context(), stage, self.model, duration, 0, 0, cached=True)
+
+    def _build_messages(self, system_prompt: str, text: str) -> List[dict]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text}
+        ]
+
+    async def _acquire_rate_limit(self, system_prompt: str, text: str):
+        limiter = rate_limiter.for_model(self.model)
+        estimated_tokens = (
+            await cpu_pool.run_in_thread("count_tokens", Tokenizer(self.model).count, system_prompt + text)
+            + settings.LLM_EXPECTED_COMPLETION_TOKENS
+        )
+        await limiter.acquire(estimated_tokens)
+        return limiter, estimated_tokens
+
     async def calculate_total_tokens(self, text: str):
-        encoding = tiktoken.encoding_for_model(self.model)
-        return len(encoding.encode(text))
-    
-    def split_text_into_token_chunks(text, model="gpt-4", max_tokens=1000, overlap=100):
-        enc = tiktoken.encoding_for_model(model)
-        tokens = enc.encode(text)
-
-        chunks = []
-        start = 0
-
-        while start < len(tokens):
-            end = start + max_tokens
-            chunk_tokens = tokens[start:end]
-            chunk_text = enc.decode(chunk_tokens)
-            chunks.append(chunk_text)
-            start += max_tokens - overlap
-        return chunks
\ No newline at end of file
+        return await cpu_pool.run_in_thread("count_tokens", Tokenizer(self.model).count, text)
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        return Tokenizer(self.model).count_batch(texts)
+
+    async def count_tokens_batch_async(self, texts: List[str]) -> List[int]:
+        """count_tokens_batch on the CPU pool's threads, for callers on the event loop."""
+        return await cpu_pool.run_in_thread("count_tokens", self.count_tokens_batch, texts)
+
+    def tokenize_text(self, text: str, max_tokens: int = 1000, overlap: int = 100) -> TokenizedText:
+        return Tokenizer(self.model).tokenize(text, max_tokens=max_tokens, overlap=overlap)
+
+    def split_text_into_token_chunks(self, text: str, max_tokens: int = 1000, overlap: int = 100) -> List[str]:
+        return self.tokenize_text(text, max_tokens=max_tokens, overlap=overlap).chunks
+
+    def pack_texts_by_tokens(self, texts: List[str], max_tokens: int, token_counts: Optional[List[int]] = None) -> List[List[str]]:
+        """
+        Groups consecutive texts so each group stays within max_tokens. A text larger
+        than max_tokens gets a group of its own.
+        """
+        if token_counts is None:
+            token_counts = self.count_tokens_batch(texts)
+        groups = []
+        current, current_tokens = [], 0
+        for text, tokens in zip(texts, token_counts):
+            if current and current_tokens + tokens > max_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
@@ -0,0 +1,98 @@
+from collections import deque
+from typing import Dict, List, Optional
+import bisect
+
+LATENCY_BUCKETS_SECONDS = [0.5, 1, 2, 5, 10, 20, 30, 60, 120]
+TOKEN_BUCKETS = [100, 250, 500, 1000, 2000, 5000, 10000, 20000, 50000]
+
+
+class Histogram:
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.samples = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.samples += 1
+
+    def to_dict(self) -> dict:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.samples,
+            "mean": self.total / self.samples if self.samples else 0.0,
+        }
+
+
+class RouteStats:
+    def __init__(self, window: int):
+        self.calls = 0
+        self.cached_calls = 0
+        self.latency = Histogram(LATENCY_BUCKETS_SECONDS)
+        self.prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self.completion_tokens = Histogram(TOKEN_BUCKETS)
+        self.recent_latencies = deque(maxlen=window)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.recent_latencies:
+            return None
+        ordered = sorted(self.recent_latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LlmTelemetry:
+    """
+    Latency and token histograms per route, where a route is (job context, stage, model).
+    Cached responses are counted but kept out of the histograms.
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.routes: Dict[str, RouteStats] = {}
+
+    @staticmethod
+    def route_key(context, stage, model: str) -> str:
+        return f"{context or '-'}:{stage or '-'}:{model}"
+
+    def route(self, context, stage, model: str) -> RouteStats:
+        key = self.route_key(context, stage, model)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats(self.window)
+        return stats
+
+    def record(self, context, stage, model: str, duration: float, prompt_tokens: int, completion_tokens: int, cached: bool = False):
+        stats = self.route(context, stage, model)
+        stats.calls += 1
+        if cached:
+            stats.cached_calls += 1
+            return
+        stats.latency.observe(duration)
+        stats.prompt_tokens.observe(prompt_tokens)
+        stats.completion_tokens.observe(completion_tokens)
+        stats.recent_latencies.append(duration)
+
+    def latency_percentile(self, context, stage, model: str, fraction: float, min_samples: int) -> Optional[float]:
+        """Recent latency percentile for a route, or None until it has min_samples calls."""
+        stats = self.routes.get(self.route_key(context, stage, model))
+        if stats is None or len(stats.recent_latencies) < min_samples:
+            return None
+        return stats.percentile(fraction)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            key: {
+                "calls": stats.calls,
+                "cached_calls": stats.cached_calls,
+                "latency_seconds": {**stats.latency.to_dict(), "p50": stats.percentile(0.5), "p95": stats.percentile(0.95)},
+                "prompt_tokens": stats.prompt_tokens.to_dict(),
+                "completion_tokens": stats.completion_tokens.to_dict(),
+            }
+            for key, stats in sorted(self.routes.items())
+        }
+
+
+llm_telemetry = LlmTelemetry()
@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from config import settings
+from enums import JobContext, LlmStage
+
+_current_job_context: ContextVar[Optional[JobContext]] = ContextVar("llm_job_context", default=None)
+
+@contextmanager
+def job_context(context: Optional[JobContext]):
+    """Marks LLM calls made inside the block as belonging to a job of this context."""
+    token = _current_job_context.set(context)
+    try:
+        yield
+    finally:
+        _current_job_context.reset(token)
+
+def get_job_context() -> Optional[JobContext]:
+    return _current_job_context.get()
+
+def resolve_model(stage: Optional[LlmStage] = None, context: Optional[JobContext] = None) -> str:
+    """
+    Picks the model for a call from Settings.LLM_MODEL_ROUTES, trying
+    "<context>:<stage>", then "<stage>", then "<context>", then LLM_DEFAULT_MODEL.
+    """
+    context = context or get_job_context()
+    routes = settings.LLM_MODEL_ROUTES
+    candidates = []
+    if context and stage:
+        candidates.append(f"{context}:{stage}")
+    if stage:
+        candidates.append(str(stage))
+    if context:
+        candidates.append(str(context))
+    for key in candidates:
+        if key in routes:
+            return routes[key]
+    return settings.LLM_DEFAULT_MODEL
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+import logging
+from beanie.odm.queries.update import UpdateResponse
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from enums import JobStatus, PipelineNodeKind
+from schemas import ContentJob, PipelineNode
+from .job_notifier import get_job_notifier
+
+
+class PipelineInputPending(Exception):
+    """Raised when a job needs a node that another worker is still producing."""
+
+    def __init__(self, content_id: str, node: PipelineNodeKind):
+        super().__init__(f"{node} for content {content_id} is being produced by another worker")
+        self.content_id = content_id
+        self.node = node
+
+
+async def claim_node(content_id: str, node: PipelineNodeKind, owner: str, input_hash: Optional[str] = None) -> bool:
+    """
+    Takes the node for this worker unless it is already complete for this input or another
+    worker holds a live lease on it. Returns whether the caller should produce it.
+    """
+    now = datetime.utcnow()
+    lease = {
+        "status": JobStatus.IN_PROGRESS,
+        "owner": owner,
+        "lease_expires_at": now + timedelta(seconds=settings.WORKER_LEASE_SECONDS),
+        "input_hash": input_hash,
+        "error": None,
+        "updated_at": now,
+    }
+    try:
+        claimed = await PipelineNode.find_one(
+            PipelineNode.content_id == content_id,
+            PipelineNode.node == node,
+            {"$or": [
+                {"status": {"$in": [JobStatus.PENDING.value, JobStatus.FAILED.value]}},
+                {"status": JobStatus.COMPLETED.value, "input_hash": {"$ne": input_hash}},
+                {"status": JobStatus.IN_PROGRESS.value, "lease_expires_at": {"$lt": now}},
+            ]},
+        ).upsert(
+            {"$set": lease},
+            on_insert=PipelineNode(content_id=content_id, node=node, **lease),
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+    except DuplicateKeyError:
+        # the node exists and did not match: complete, or leased to someone else
+        return False
+    return claimed is not None
+
+
+async def finish_node(content_id: str, node: PipelineNodeKind, owner: str, error: Optional[str] = None):
+    now = datetime.utcnow()
+    await PipelineNode.find_one(
+        PipelineNode.content_id == content_id,
+        PipelineNode.node == node,
+        PipelineNode.owner == owner,
+    ).update({"$set": {
+        "status": JobStatus.FAILED if error else JobStatus.COMPLETED,
+        "error": error,
+        "owner": None,
+        "lease_expires_at": None,
+        "completed_at": None if error else now,
+        "updated_at": now,
+    }})
+    await wake_waiting_jobs(content_id, node)
+
+
+async def wake_waiting_jobs(content_id: str, node: PipelineNodeKind):
+    """
+    Makes jobs deferred on this node claimable right away. Setting woken_at is what the
+    change stream notifier reacts to, since the jobs' status does not change.
+    """
+    now = datetime.utcnow()
+    result = await ContentJob.find(
+        ContentJob.content_id == content_id,
+        ContentJob.status == JobStatus.PENDING,
+        ContentJob.waiting_on == str(node),
+    ).update({"$set": {"next_run_at": None, "waiting_on": None, "woken_at": now, "updated_at": now}})
+    if result and result.modified_count:
+        logging.info(f"{node} for content {content_id} is ready, waking {result.modified_count} jobs")
+        await get_job_notifier().publish()
+
+
+async def require_node(
+    content_id: str,
+    node: PipelineNodeKind,
+    produce: Callable[[], Awaitable],
+    owner: str,
+    input_hash: Optional[str] = None,
+):
+    """
+    Makes sure a shared upstream node has run for this content. The first job to need it
+    produces it; jobs arriving while it runs get PipelineInputPending and are deferred until
+    it completes. A node that is already complete for this input is not run again.
+    """
+    if not await claim_node(content_id, node, owner, input_hash):
+        current = await PipelineNode.find_one(PipelineNode.content_id == content_id, PipelineNode.node == node)
+        if current and current.status == JobStatus.COMPLETED and current.input_hash == input_hash:
+            return
+        raise PipelineInputPending(content_id, node)
+
+    logging.info(f"Producing {node} for content {content_id}")
+    try:
+        await produce()
+    except BaseException as e:
+        # includes cancellation, so a stopped job does not leave the node leased to a live worker
+        await finish_node(content_id, node, owner, error=f"{type(e).__name__}: {e}")
+        raise
+    await finish_node(content_id, node, owner)
@@ -0,0 +1,137 @@
+from typing import Dict, Optional, Mapping
+import asyncio
+import logging
+import re
+import time
+from config import settings
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parses OpenAI reset headers such as "1s", "6m0s" or "250ms" into seconds.
+    """
+    if not value:
+        return None
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value):
+        matched = True
+        amount = float(amount)
+        if unit == "ms":
+            total += amount / 1000
+        elif unit == "s":
+            total += amount
+        elif unit == "m":
+            total += amount * 60
+        elif unit == "h":
+            total += amount * 3600
+    return total if matched else None
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def time_until(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def clamp(self, remaining: float):
+        """Never let the local view be more optimistic than the server's."""
+        self._refill()
+        self.tokens = min(self.tokens, remaining)
+
+
+class ModelRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets for one model.
+    Callers are admitted one at a time in arrival order, so a large prompt
+    waiting for token budget is not starved by a stream of small ones.
+    """
+
+    def __init__(self, model: str, rpm: int, tpm: int):
+        self.model = model
+        self.requests = TokenBucket(rpm, rpm / 60)
+        self.tokens = TokenBucket(tpm, tpm / 60)
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+
+    async def acquire(self, estimated_tokens: int):
+        async with self._lock:
+            while True:
+                wait = max(
+                    self._paused_until - time.monotonic(),
+                    self.requests.time_until(1),
+                    self.tokens.time_until(estimated_tokens),
+                )
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(estimated_tokens)
+                    return
+                await asyncio.sleep(wait)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        if actual_tokens is None:
+            return
+        difference = estimated_tokens - actual_tokens
+        if difference > 0:
+            self.tokens.refund(difference)
+        else:
+            self.tokens.consume(-difference)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_requests is not None:
+            self.requests.clamp(float(remaining_requests))
+        if remaining_tokens is not None:
+            self.tokens.clamp(float(remaining_tokens))
+
+    def pause(self, headers: Mapping[str, str]):
+        """Stops admitting calls until the server says the exhausted budget resets."""
+        delay = max(
+            parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or 0,
+            parse_reset_duration(headers.get("x-ratelimit-reset-tokens")) or 0,
+            float(headers.get("retry-after") or 0),
+        ) or 1.0
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logging.warning(f"Rate limited on {self.model}, pausing dispatch for {delay:.2f}s")
+
+
+class LlmRateLimiter:
+    def __init__(self):
+        self._limiters: Dict[str, ModelRateLimiter] = {}
+
+    def for_model(self, model: str) -> ModelRateLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limits = settings.LLM_RATE_LIMITS.get(model, {})
+            limiter = ModelRateLimiter(
+                model,
+                rpm=limits.get("rpm", settings.LLM_DEFAULT_RPM),
+                tpm=limits.get("tpm", settings.LLM_DEFAULT_TPM),
+            )
+            self._limiters[model] = limiter
+        return limiter
+
+
+rate_limiter = LlmRateLimiter()
@@ -0,0 +1,51 @@
+from functools import lru_cache
+from typing import List
+import tiktoken
+from dataclass import TokenizedText
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """
+    Resolves and caches the tiktoken encoding for a model. Lookups are otherwise
+    repeated on every call, which re-reads the BPE ranks for unknown aliases.
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+class Tokenizer:
+    def __init__(self, model: str):
+        self.model = model
+        self.encoding = get_encoding(model)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [len(tokens) for tokens in self.encoding.encode_batch(texts)]
+
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        return self.encoding.encode_batch(texts)
+
+    def tokenize(self, text: str, max_tokens: int, overlap: int = 0) -> TokenizedText:
+        """
+        Encodes the text once and returns its token count together with the
+        token-window chunks cut from that same token array.
+        """
+        if overlap >= max_tokens:
+            raise ValueError("overlap must be smaller than max_tokens")
+        tokens = self.encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return TokenizedText(token_count=len(tokens), chunks=[text] if text else [])
+
+        chunks = []
+        start = 0
+        while start < len(tokens):
+            chunks.append(self.encoding.decode(tokens[start:start + max_tokens]))
+            if start + max_tokens >= len(tokens):
+                break
+            start += max_tokens - overlap
+        return TokenizedText(token_count=len(tokens), chunks=chunks)
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+
+class UsageTracker:
+    """
+    Accumulates token usage and wall time of LLM calls per stage for one job.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, dict] = {}
+
+    def record(self, stage: str, prompt_tokens: int, completion_tokens: int, duration: float, cached: bool = False, cached_prompt_tokens: int = 0):
+        totals = self.stages.setdefault(stage, {
+            "calls": 0,
+            "cached_calls": 0,
+            "prompt_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "duration_seconds": 0.0,
+        })
+        totals["calls"] += 1
+        totals["cached_calls"] += int(cached)
+        totals["prompt_tokens"] += prompt_tokens
+        totals["cached_prompt_tokens"] += cached_prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["total_tokens"] += prompt_tokens + completion_tokens
+        totals["duration_seconds"] = round(totals["duration_seconds"] + duration, 3)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(stage["total_tokens"] for stage in self.stages.values())
+
+    def to_dict(self) -> dict:
+        total = {"calls": 0, "cached_calls": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "duration_seconds": 0.0}
+        for stage in self.stages.values():
+            for key in total:
+                total[key] += stage[key]
+        total["duration_seconds"] = round(total["duration_seconds"], 3)
+        return {"stages": self.stages, "total": total}
+
+
+_current_tracker: ContextVar[Optional[UsageTracker]] = ContextVar("llm_usage_tracker", default=None)
+
+@contextmanager
+def track_usage():
+    """Collects usage of every LLM call made inside the block, including tasks it spawns."""
+    tracker = UsageTracker()
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+def record_llm_usage(stage: Optional[str], prompt_tokens: int, completion_tokens: int, duration: float, cached: bool = False, cached_prompt_tokens: int = 0):
+    tracker = _current_tracker.get()
+    if tracker is not None:
+        tracker.record(str(stage or "unspecified"), prompt_tokens, completion_tokens, duration, cached, cached_prompt_tokens)
@@ -1,36 +1,61 @@
-from openai import OpenAI
-import re
 from urllib.parse import urlparse, parse_qs
 from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled
 from .llm_service import Llm_Service
-from prompts import get_blog_outline_prompt, get_blog_post_prompt, get_summary_prompt, get_twitter_post_prompt, get_reddit_post_prompt, get_video_ideas_prompt, build_sentiment_insight_prompt, build_aggregate_prompt, get_video_ideas_aggregate_prompt
-from utils import json_to_clean_markdown
-import json
+from .llm_batch import gather_batched
+from .model_router import resolve_model
+from prompts import get_blog_outline_prompt, get_blog_post_prompt, get_summary_prompt, get_summary_reduce_prompt, get_twitter_post_prompt, get_reddit_post_prompt, get_video_ideas_prompt, build_sentiment_insight_prompt, build_aggregate_prompt, get_video_ideas_aggregate_prompt, get_multi_platform_post_prompt
+from utils import json_to_clean_markdown, normalize_whitespace
+import hashlib
 from models import YTExtractionRequest
 from schemas import ContentJob, ContentModel, UserModel, Comment
 from datetime import datetime
-from enums import JobStatus, JobContext
+from enums import JobStatus, JobContext, LlmStage
 import logging
-import requests
+import asyncio
 import time
 from .yt_transcript_fetch import YouTubeTranscriptExtractor
+from .youtube_data_client import YoutubeDataClient
+from .chunker import TranscriptChunker
+from .job_notifier import get_job_notifier
+from .job_queue import job_priority
+from .cpu_pool import cpu_pool, normalize_whitespace_offloaded
+from .checkpoints import checkpoint_scope, checkpoint_store, checkpointed
 from config import settings
-from dataclass import SocialPostResponse, SocialPost
-from typing import List, Dict
+from dataclass import Prompt, SocialPostResponse, SocialPost
+from typing import AsyncIterator, Callable, List, Dict, Optional, Tuple
+from dataclasses import asdict
 from fastapi import HTTPException
 logging.basicConfig(level=logging.INFO)
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# in-flight content summaries keyed by content id and raw_text hash
+_summary_tasks: Dict[str, asyncio.Task] = {}
+_summary_waiters: Dict[str, int] = {}
+
 class YoutubeService:
-    def __init__(self):
-        pass
+    def __init__(self, batch: bool = False):
+        self.batch = batch
+
+    def get_llm_service(self, stage: Optional[LlmStage] = None) -> Llm_Service:
+        """Returns a service for the model routed to this stage and the current job's context."""
+        return Llm_Service(resolve_model(stage), batch=self.batch)
 
     async def extract_transcript(self, link: str):
         logging.info(f"Extracting transcript for link: {link}")
         # video_id = self.extract_video_id(link)
         yt_trnscript_extractor = YouTubeTranscriptExtractor()
-        transcript = yt_trnscript_extractor.get_transcript(link)
+        # caption download, VTT parsing and audio conversion all block, so they run off the loop
+        transcript = await cpu_pool.run_in_thread("extract_transcript", yt_trnscript_extractor.get_transcript, link)
         return transcript
+
+    async def extract_transcript_with_segments(self, link: str):
+        """
+        Like extract_transcript, but also returns the timed caption segments when the source provides them.
+        """
+        logging.info(f"Extracting transcript with segments for link: {link}")
+        yt_trnscript_extractor = YouTubeTranscriptExtractor()
+        return await cpu_pool.run_in_thread(
+            "extract_transcript", yt_trnscript_extractor.get_transcript_with_segments, link
+        )
     
     def extract_video_id(self, link: str) -> None:
         parsed_url = urlparse(link)
@@ -42,87 +67,285 @@ class YoutubeService:
             return parsed_url.path.lstrip('/')
         return None
     
-    async def extract_content_from_transcript(self, content: str):
-        content = content.replace('\n', ' ')
-        content = re.sub(r'\s+', ' ', content).strip()
-        llm_service = Llm_Service("gpt-4o")
-        token_count = await llm_service.calculate_total_tokens(content)
-        content_chunks = []
-        if token_count > 10000:
-            content_chunks = llm_service.split_text_into_token_chunks(content, model="gpt-4o", max_tokens=10000, overlap=1000)
-            content = " ".join(content_chunks)
-        else:
-            content_chunks = [content]
-        
-        summaries = await self.get_summary_from_content_chunks(content_chunks, llm_service)
-        content = " ".join(summaries)
-        content = content.replace('\n', ' ')
-        content = re.sub(r'\s+', ' ', content).strip()
-
-        blog_outline = await llm_service.extract_data_from_llm(get_blog_outline_prompt(content))
-        blog_post_json_string = await llm_service.extract_data_from_llm(get_blog_post_prompt(blog_outline))
-        blog_post = json.loads(blog_post_json_string)
+    async def extract_content_from_transcript(self, content: str, summary: Optional[str] = None):
+        if summary is None:
+            summary = await self.summarize_text(content)
+        blog_outline = await self.get_llm_service(LlmStage.BLOG_OUTLINE).extract_data_from_llm(get_blog_outline_prompt(summary), stage=LlmStage.BLOG_OUTLINE)
+        blog_post = await self.get_llm_service(LlmStage.BLOG_POST).extract_json_from_llm(get_blog_post_prompt(blog_outline), stage=LlmStage.BLOG_POST)
         return blog_post
     
-    async def extract_twitter_posts(self, content: str, count: int = 1) -> SocialPostResponse:
+    async def extract_twitter_posts(self, content: str, count: int = 1, summary: Optional[str] = None) -> SocialPostResponse:
         """
         Extracts Twitter posts from the content using LLM.
         """
-        llm_service = Llm_Service("gpt-4o")
-        token_count = await llm_service.calculate_total_tokens(content)
-        content_chunks = []
-        if token_count > 10000:
-            content_chunks = llm_service.split_text_into_token_chunks(content, model="gpt-4o", max_tokens=10000, overlap=1000)
-            content = " ".join(content_chunks)
-        else:
-            content_chunks = [content]
-
-        summaries = await self.get_summary_from_content_chunks(content_chunks, llm_service)
-
-        content = " ".join(summaries)
-        content = content.replace('\n', ' ')
-        content = re.sub(r'\s+', ' ', content).strip()
-        
-        
-        twitter_posts = await llm_service.extract_data_from_llm(get_twitter_post_prompt(content, count))
-        twitter_posts = json.loads(twitter_posts)
+        if summary is None:
+            summary = await self.summarize_text(content)
+        llm_service = self.get_llm_service(LlmStage.SOCIAL_POST)
+        twitter_posts = await llm_service.extract_json_from_llm(get_twitter_post_prompt(summary, count), stage=LlmStage.SOCIAL_POST)
         posts = [SocialPost(**post) for post in twitter_posts.get("posts", [])]
         return SocialPostResponse(posts=posts, count=twitter_posts.get("count", len(posts)))
     
-    async def extract_reddit_posts(self, content: str, count: int = 1):
+    async def extract_reddit_posts(self, content: str, count: int = 1, summary: Optional[str] = None):
         """
         Extracts Reddit posts from the content using LLM.
         """
-        llm_service = Llm_Service("gpt-4o")
-        token_count = await llm_service.calculate_total_tokens(content)
-        content_chunks = []
-        if token_count > 10000:
-            content_chunks = llm_service.split_text_into_token_chunks(content, model="gpt-4o", max_tokens=10000, overlap=1000)
-            content = " ".join(content_chunks)
+        if summary is None:
+            summary = await self.summarize_text(content)
+        llm_service = self.get_llm_service(LlmStage.SOCIAL_POST)
+        reddit_posts = await llm_service.extract_json_from_llm(get_reddit_post_prompt(summary, count), stage=LlmStage.SOCIAL_POST)
+        posts = [SocialPost(**post) for post in reddit_posts.get("posts", [])]
+        return SocialPostResponse(posts=posts, count=reddit_posts.get("count", len(posts)))
+
+    async def extract_social_posts(
+        self,
+        content: str,
+        counts: Dict[JobContext, int],
+        summary: Optional[str] = None,
+    ) -> Dict[JobContext, SocialPostResponse]:
+        """
+        Generates posts for several platforms from one prompt and one response.
+        Platforms the model left out of the response are missing from the result.
+        """
+        if summary is None:
+            summary = await self.summarize_text(content)
+        llm_service = self.get_llm_service(LlmStage.SOCIAL_POST)
+        response = await llm_service.extract_json_from_llm(
+            get_multi_platform_post_prompt(summary, {str(context): count for context, count in counts.items()}),
+            stage=LlmStage.SOCIAL_POST,
+        )
+        results = {}
+        for context in counts:
+            platform_posts = response.get(str(context))
+            if platform_posts is None:
+                continue
+            posts = [SocialPost(**post) for post in platform_posts.get("posts", [])]
+            results[context] = SocialPostResponse(posts=posts, count=platform_posts.get("count", len(posts)))
+        return results
+
+    async def stream_content_from_transcript(self, content: str) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Streaming variant of extract_content_from_transcript. Yields (event, data) pairs:
+        stage progress, token deltas of the outline and post, and finally the parsed blog post.
+        """
+        summary = None
+        async for event in self._stream_summary(content):
+            if event[0] == "summary":
+                summary = event[1]["summary"]
+            else:
+                yield event
+
+        yield "progress", {"stage": "outline", "message": "generating outline"}
+        outline_parts = []
+        async for delta in self.get_llm_service(LlmStage.BLOG_OUTLINE).stream_data_from_llm(get_blog_outline_prompt(summary), stage=LlmStage.BLOG_OUTLINE):
+            outline_parts.append(delta)
+            yield "delta", {"stage": "outline", "text": delta}
+        yield "progress", {"stage": "outline", "message": "outline ready"}
+
+        yield "progress", {"stage": "post", "message": "writing blog post"}
+        post_parts = []
+        llm_service = self.get_llm_service(LlmStage.BLOG_POST)
+        async for delta in llm_service.stream_data_from_llm(get_blog_post_prompt("".join(outline_parts)), stage=LlmStage.BLOG_POST, json_output=True):
+            post_parts.append(delta)
+            yield "delta", {"stage": "post", "text": delta}
+        yield "result", await llm_service.parse_json_response("".join(post_parts))
+
+    async def stream_twitter_posts(self, content: str, count: int = 1) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Streaming variant of extract_twitter_posts, yielding the same events as stream_content_from_transcript.
+        """
+        summary = None
+        async for event in self._stream_summary(content):
+            if event[0] == "summary":
+                summary = event[1]["summary"]
+            else:
+                yield event
+
+        llm_service = self.get_llm_service(LlmStage.SOCIAL_POST)
+        yield "progress", {"stage": "posts", "message": "writing posts"}
+        parts = []
+        async for delta in llm_service.stream_data_from_llm(get_twitter_post_prompt(summary, count), stage=LlmStage.SOCIAL_POST, json_output=True):
+            parts.append(delta)
+            yield "delta", {"stage": "posts", "text": delta}
+        twitter_posts = await llm_service.parse_json_response("".join(parts))
+        posts = [SocialPost(**post) for post in twitter_posts.get("posts", [])]
+        yield "result", asdict(SocialPostResponse(posts=posts, count=twitter_posts.get("count", len(posts))))
+
+    async def _stream_summary(self, content: str) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Runs summarize_text in the background, relaying per-chunk progress as it happens.
+        The last event is ("summary", {"summary": ...}).
+        """
+        events: asyncio.Queue = asyncio.Queue()
+
+        def on_progress(completed: int, total: int):
+            events.put_nowait(("progress", {
+                "stage": "summary",
+                "message": f"summarized chunk {completed}/{total}",
+                "completed": completed,
+                "total": total,
+            }))
+
+        yield "progress", {"stage": "summary", "message": "summarizing transcript"}
+        task = asyncio.create_task(self.summarize_text(content, progress=on_progress))
+        try:
+            while not task.done() or not events.empty():
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield getter.result()
+                else:
+                    getter.cancel()
+            summary = task.result()
+        finally:
+            # the client may disconnect mid-stream; stop paying for the remaining chunks
+            if not task.done():
+                task.cancel()
+        yield "progress", {"stage": "summary", "message": "summary ready"}
+        yield "summary", {"summary": summary}
+
+    async def summarize_text(
+        self,
+        content: str,
+        progress: Optional[Callable[[int, int], None]] = None,
+        segments: Optional[List[dict]] = None,
+    ) -> str:
+        """
+        Condenses a transcript into a single summary by chunking it and summarizing each chunk.
+        Caption segments, when available, are chunked whole and keep their timestamps.
+        """
+        llm_service = self.get_llm_service(LlmStage.CHUNK_SUMMARY)
+        chunker = TranscriptChunker(
+            llm_service,
+            max_tokens=settings.SUMMARY_CHUNK_TOKENS,
+            overlap_tokens=settings.SUMMARY_CHUNK_OVERLAP_TOKENS,
+        )
+        # tiktoken releases the GIL while encoding, so a thread is enough here
+        if segments:
+            chunks = await cpu_pool.run_in_thread("chunk_transcript", chunker.chunk_segments, segments)
         else:
-            content_chunks = [content]
+            content = await normalize_whitespace_offloaded(content)
+            chunks = await cpu_pool.run_in_thread("chunk_transcript", chunker.chunk_text, content)
+        content_chunks = [chunk.render() for chunk in chunks]
 
-        summaries = await self.get_summary_from_content_chunks(content_chunks, llm_service)
+        summaries = await self.get_summary_from_content_chunks(content_chunks, llm_service, progress=progress)
+        summaries = await self.reduce_summaries(summaries)
+        return normalize_whitespace(" ".join(summaries))
 
-        content = " ".join(summaries)
-        content = content.replace('\n', ' ')
-        content = re.sub(r'\s+', ' ', content).strip()
-        
-        reddit_posts = await llm_service.extract_data_from_llm(get_reddit_post_prompt(content, count))
-        reddit_posts = json.loads(reddit_posts)
-        posts = [SocialPost(**post) for post in reddit_posts.get("posts", [])]
-        return SocialPostResponse(posts=posts, count=reddit_posts.get("count", len(posts)))
-    
-    async def get_summary_from_content_chunks(self, content_chunks: list, llm_service: Llm_Service = None):
+    async def get_content_summary(self, content: ContentModel) -> str:
+        """
+        Returns the stored summary for a content, rebuilding it when raw_text has changed.
+        Concurrent callers for the same content in this process share one computation.
+        """
+        source_hash = hashlib.sha256((content.raw_text or "").encode("utf-8")).hexdigest()
+        if content.summary and content.summary_source_hash == source_hash:
+            return content.summary
+
+        key = f"{content.id}:{source_hash}"
+        task = _summary_tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(self._build_content_summary(content, source_hash))
+            _summary_tasks[key] = task
+            # a task dropped when cancelled may finish after a newer one took its key
+            task.add_done_callback(lambda done: _summary_tasks.pop(key) if _summary_tasks.get(key) is done else None)
+        # shield so one cancelled waiter does not cancel the computation for the others
+        _summary_waiters[key] = _summary_waiters.get(key, 0) + 1
+        try:
+            summary = await asyncio.shield(task)
+        finally:
+            _summary_waiters[key] -= 1
+            if not _summary_waiters[key]:
+                del _summary_waiters[key]
+                # every waiter is gone (e.g. their jobs were cancelled), so stop paying for it;
+                # unregistered in the same step so a new caller starts afresh instead of
+                # picking up the task being torn down
+                _summary_tasks.pop(key, None)
+                task.cancel()
+        content.summary = summary
+        content.summary_source_hash = source_hash
+        return summary
+
+    async def _build_content_summary(self, content: ContentModel, source_hash: str) -> str:
+        # another job may have stored the summary since this content was loaded
+        stored = await ContentModel.get(content.id)
+        if stored and stored.summary and stored.summary_source_hash == source_hash:
+            return stored.summary
+        # chunk summaries are checkpointed per transcript version, so whichever job retries
+        # the summary picks up where the failed one stopped
+        scope = f"summary:{content.id}:{source_hash}"
+        with checkpoint_scope(scope):
+            summary = await self.summarize_text(content.raw_text or "", segments=content.transcript_segments)
+        await ContentModel.find_one(ContentModel.id == content.id).update(
+            {"$set": {"summary": summary, "summary_source_hash": source_hash}}
+        )
+        await checkpoint_store.clear(scope)
+        return summary
+
+    async def get_summary_from_content_chunks(
+        self,
+        content_chunks: list,
+        llm_service: Llm_Service = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ):
         if llm_service is None:
             # If no LLM service is provided, create a new instance
             # This allows for flexibility in using different LLM services if needed
-            llm_service = Llm_Service("gpt-4o")
-        summaries = []
-        for chunk in content_chunks:
-            summary = await llm_service.extract_data_from_llm(get_summary_prompt(chunk))
-            summaries.append(summary)
+            llm_service = self.get_llm_service(LlmStage.CHUNK_SUMMARY)
+        prompts = [get_summary_prompt(chunk) for chunk in content_chunks]
+        return await self._run_summary_prompts(prompts, llm_service, LlmStage.CHUNK_SUMMARY, progress=progress)
+
+    async def reduce_summaries(self, summaries: List[str], llm_service: Llm_Service = None) -> List[str]:
+        """
+        Tree-reduces chunk summaries: packs them into groups that fit one call, summarizes
+        the groups in parallel and repeats until the joined result fits SUMMARY_TARGET_TOKENS.
+        """
+        if llm_service is None:
+            llm_service = self.get_llm_service(LlmStage.SUMMARY_REDUCE)
+        level = 0
+        while len(summaries) > 1:
+            token_counts = await llm_service.count_tokens_batch_async(summaries)
+            if sum(token_counts) <= settings.SUMMARY_TARGET_TOKENS:
+                break
+            groups = llm_service.pack_texts_by_tokens(summaries, settings.SUMMARY_REDUCE_GROUP_TOKENS, token_counts)
+            if len(groups) == len(summaries):
+                # every summary fills a group on its own; pair them up so each level still shrinks
+                groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+            level += 1
+            logging.info(f"Reduce level {level}: {len(summaries)} summaries ({sum(token_counts)} tokens) into {len(groups)} groups")
+            prompts = [get_summary_reduce_prompt(group) for group in groups]
+            summaries = await self._run_summary_prompts(prompts, llm_service, LlmStage.SUMMARY_REDUCE)
         return summaries
+
+    async def _run_summary_prompts(
+        self,
+        prompts: List[Prompt],
+        llm_service: Llm_Service,
+        stage: LlmStage,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[str]:
+        semaphore = asyncio.Semaphore(max(1, settings.SUMMARY_CONCURRENCY))
+        total = len(prompts)
+        completed = 0
+
+        async def summarize(index: int, prompt: Prompt):
+            nonlocal completed
+            async with semaphore:
+                started = time.perf_counter()
+                summary = await checkpointed(
+                    stage,
+                    hashlib.sha256(prompt.user.encode("utf-8")).hexdigest(),
+                    lambda: llm_service.extract_data_from_llm(prompt, stage=stage),
+                )
+                logging.info(f"{stage} {index + 1}/{total} took {time.perf_counter() - started:.2f}s")
+                completed += 1
+                if progress:
+                    progress(completed, total)
+                return summary
+
+        started = time.perf_counter()
+        # gather keeps results in prompt order regardless of completion order
+        summaries = await gather_batched(*(summarize(i, prompt) for i, prompt in enumerate(prompts)))
+        logging.info(f"{stage}: {total} calls in {time.perf_counter() - started:.2f}s wall clock")
+        return list(summaries)
     
     async def handle_yt_extraction_request(self, request: YTExtractionRequest, current_user: UserModel):
         """
@@ -135,15 +358,16 @@ class YoutubeService:
             await existing_content.save()
             return { "message": "Content already exists." }
         
-        extract_transcript = await self.extract_transcript(request.link)
-        if(len(extract_transcript) == 0):
+        extract_transcript = await self.extract_transcript_with_segments(request.link)
+        if(len(extract_transcript) == 0 or not extract_transcript[0]):
             raise HTTPException(status_code=400, detail="No transcript found for the given link.")
         content = ContentModel(
             userId=str(current_user.id),
             link=request.link,
             is_active=True,
             title=request.title,
-            raw_text=extract_transcript[0]
+            raw_text=extract_transcript[0],
+            transcript_segments=extract_transcript[2]
         )
         content = await content.insert()
 
@@ -247,43 +471,28 @@ class YoutubeService:
         
         # Insert all content jobs in bulk
         for job in content_jobs:
+            job.priority = job_priority(job.context)
             await job.insert()
+        await get_job_notifier().publish()
 
         return { "message": "Content created and extraction scheduled." }
     
-    async def get_all_comments(self, video_id, delay=0.1):
-        base_url = "https://www.googleapis.com/youtube/v3/commentThreads"
+    async def get_all_comments(self, video_id, delay: Optional[float] = None):
         comments = []
-        params = {
-            "part": "snippet,replies",
-            "videoId": video_id,
-            "key": settings.YT_GOOGLE_API_KEY,
-            "maxResults": 100,
-            "textFormat": "plainText"
-        }
-
-        while True:
-            response = requests.get(base_url, params=params).json()
-            for item in response.get("items", []):
-                top_comment = item["snippet"]["topLevelComment"]["snippet"]
+        async for item in YoutubeDataClient().iter_comment_threads(video_id, page_delay=delay):
+            top_comment = item["snippet"]["topLevelComment"]["snippet"]
+            comments.append({
+                "text": top_comment["textDisplay"],
+                "name": top_comment["authorDisplayName"]
+            })
+
+            replies = item.get("replies", {}).get("comments", [])
+            for reply in replies:
+                reply_snippet = reply["snippet"]
                 comments.append({
-                    "text": top_comment["textDisplay"],
-                    "name": top_comment["authorDisplayName"]
+                    "text": reply_snippet["textDisplay"],
+                    "name": reply_snippet["authorDisplayName"]
                 })
-
-                replies = item.get("replies", {}).get("comments", [])
-                for reply in replies:
-                    reply_snippet = reply["snippet"]
-                    comments.append({
-                        "text": reply_snippet["textDisplay"],
-                        "name": reply_snippet["authorDisplayName"]
-                    })
-
-            if "nextPageToken" in response:
-                params["pageToken"] = response["nextPageToken"]
-                time.sleep(delay)
-            else:
-                break
         return comments
     
     def chunk_comments(self, comments: List[Comment], chunk_size=100):
@@ -291,23 +500,20 @@ class YoutubeService:
             yield comments[i:i + chunk_size]
 
     async def generate_ideas_from_comments(self, comments: List[Comment]):
-        llm_service = Llm_Service("gpt-4o")
-        generated_comms = await llm_service.extract_data_from_llm(get_video_ideas_prompt(comments))
+        llm_service = self.get_llm_service(LlmStage.COMMENT_IDEAS)
+        generated_comms = await llm_service.extract_json_from_llm(get_video_ideas_prompt(comments), stage=LlmStage.COMMENT_IDEAS)
         print(generated_comms, "Generated Comments")
-        generated_comms = json.loads(generated_comms)
         return generated_comms or { "ideas": [], "count": 0 }
     
     async def generate_ideas_from_comments_aggregate(self, ideas: List[str]):
-        llm_service = Llm_Service("gpt-4o")
-        generated_ideas = await llm_service.extract_data_from_llm(get_video_ideas_aggregate_prompt(ideas))
-        generated_ideas = json.loads(generated_ideas)
+        llm_service = self.get_llm_service(LlmStage.AGGREGATE)
+        generated_ideas = await llm_service.extract_json_from_llm(get_video_ideas_aggregate_prompt(ideas), stage=LlmStage.AGGREGATE)
         return generated_ideas or { "ideas": [], "count": 0 }
     
     async def setiment_analysis(self, comments: List[Comment]):
         prompt = build_sentiment_insight_prompt(comments)
-        llm_service = Llm_Service("gpt-4o")
-        response = await llm_service.extract_data_from_llm(prompt)
-        response = json.loads(response)
+        llm_service = self.get_llm_service(LlmStage.COMMENT_SENTIMENT)
+        response = await llm_service.extract_json_from_llm(prompt, stage=LlmStage.COMMENT_SENTIMENT)
         return response or {}
     
     async def sentiment_analysis_aggregate(
@@ -323,7 +529,6 @@ class YoutubeService:
             positives=top_positives,
             negatives=top_negatives,
         )
-        llm_service = Llm_Service("gpt-4o")
-        response = await llm_service.extract_data_from_llm(final_agg_prompt)
-        response = json.loads(response)
+        llm_service = self.get_llm_service(LlmStage.AGGREGATE)
+        response = await llm_service.extract_json_from_llm(final_agg_prompt, stage=LlmStage.AGGREGATE)
         return response or {}
@@ -0,0 +1,106 @@
+from typing import AsyncIterator, Optional
+import asyncio
+import logging
+import random
+import httpx
+from config import settings
+
+# 403 reasons that mean "slow down" rather than "not allowed"
+QUOTA_REASONS = {"quotaExceeded", "rateLimitExceeded", "userRateLimitExceeded"}
+
+
+class YoutubeQuotaExceeded(Exception):
+    """The API key was still out of quota after retrying."""
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+def get_youtube_http_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide client for the YouTube Data API, creating it on first use,
+    so paging through comments reuses one connection instead of a handshake per page.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=settings.YT_DATA_API_BASE_URL,
+            timeout=settings.YT_DATA_API_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.YT_DATA_API_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.YT_DATA_API_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+async def close_youtube_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _error_reason(response: httpx.Response) -> Optional[str]:
+    try:
+        return response.json()["error"]["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+class YoutubeDataClient:
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key or settings.YT_GOOGLE_API_KEY
+        self.client = get_youtube_http_client()
+
+    async def get(self, path: str, params: dict) -> dict:
+        """
+        GETs an API resource, retrying dropped connections, 5xx and quota errors with
+        jittered backoff. Other errors (bad video id, disabled comments) raise straight away.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.get(path, params={**params, "key": self.api_key})
+                if response.is_success:
+                    return response.json()
+                reason = _error_reason(response)
+                if response.status_code == 429 or reason in QUOTA_REASONS:
+                    error = YoutubeQuotaExceeded(f"YouTube Data API {path}: {reason or response.status_code}")
+                else:
+                    response.raise_for_status()
+                    return response.json()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500:
+                    raise
+                error = e
+            except httpx.TransportError as e:
+                error = e
+
+            if attempt >= settings.YT_DATA_API_MAX_RETRIES:
+                raise error
+            attempt += 1
+            delay = random.uniform(0, min(
+                settings.YT_DATA_API_RETRY_MAX_SECONDS,
+                settings.YT_DATA_API_RETRY_BASE_SECONDS * 2 ** attempt,
+            ))
+            logging.warning(f"YouTube Data API {path} failed ({error}), retry {attempt}/{settings.YT_DATA_API_MAX_RETRIES} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def iter_comment_threads(self, video_id: str, page_delay: Optional[float] = None) -> AsyncIterator[dict]:
+        """Yields every comment thread of a video, waiting page_delay between pages."""
+        if page_delay is None:
+            page_delay = settings.YT_COMMENTS_PAGE_DELAY_SECONDS
+        params = {
+            "part": "snippet,replies",
+            "videoId": video_id,
+            "maxResults": 100,
+            "textFormat": "plainText",
+        }
+        while True:
+            page = await self.get("commentThreads", params)
+            for item in page.get("items", []):
+                yield item
+            if not page.get("nextPageToken"):
+                return
+            params["pageToken"] = page["nextPageToken"]
+            await asyncio.sleep(page_delay)
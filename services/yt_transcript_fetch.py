@@ -370,6 +370,21 @@ class YouTubeTranscriptExtractor:
         Returns:
             Tuple of (transcript_text, method_used)
         """
+        text, method, _ = self.get_transcript_with_segments(video_url, languages)
+        return text, method
+    
+    def get_transcript_with_segments(self, video_url: str, languages: List[str] = None) -> Tuple[Optional[str], Optional[str], Optional[List[dict]]]:
+        """
+        Get transcript using all available methods with fallback strategy, keeping timing data.
+        
+        Args:
+            video_url: YouTube video URL
+            languages: List of language codes to try
+            
+        Returns:
+            Tuple of (transcript_text, method_used, segments). Segments are
+            {"text", "start", "duration"} dicts, or None when the method has no timing data.
+        """
         if languages is None:
             languages = [self.default_language]
             
@@ -381,7 +396,7 @@ class YouTubeTranscriptExtractor:
         
         if text:
             print(f"✓ Found {transcript_type} transcript with YouTube API!")
-            return text, f"youtube_api_{transcript_type}"
+            return text, f"youtube_api_{transcript_type}", self._normalize_segments(transcript_data)
         
         # Method 2: yt-dlp caption extraction
         print("Trying Method 2: yt-dlp caption extraction...")
@@ -389,7 +404,7 @@ class YouTubeTranscriptExtractor:
         
         if ytdlp_text:
             print(f"✓ Found {ytdlp_type} transcript with yt-dlp!")
-            return ytdlp_text, f"ytdlp_{ytdlp_type}"
+            return ytdlp_text, f"ytdlp_{ytdlp_type}", None
         
         # Method 4: Speech recognition (last resort)
         print("Trying Method 4: Speech recognition...")
@@ -397,10 +412,25 @@ class YouTubeTranscriptExtractor:
         
         if sr_text:
             print("✓ Speech recognition successful!")
-            return sr_text, "speech_recognition"
+            return sr_text, "speech_recognition", None
         
         print("✗ All transcription methods failed")
-        return None, None
+        return None, None, None
+    
+    def _normalize_segments(self, transcript_data) -> Optional[List[dict]]:
+        """Convert youtube-transcript-api entries (dicts or snippet objects) to plain dicts."""
+        if not transcript_data:
+            return None
+        segments = []
+        for entry in transcript_data:
+            if not isinstance(entry, dict):
+                entry = {"text": entry.text, "start": entry.start, "duration": entry.duration}
+            segments.append({
+                "text": entry.get("text", ""),
+                "start": float(entry.get("start", 0)),
+                "duration": float(entry.get("duration", 0)),
+            })
+        return segments
     
     def cleanup(self):
         """Clean up temporary files."""
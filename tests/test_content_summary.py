@@ -0,0 +1,45 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from services import youtube
+from services.youtube import YoutubeService
+
+
+class SharedSummaryCancellationTest(unittest.TestCase):
+    def test_new_caller_after_last_waiter_cancelled_gets_a_fresh_summary(self):
+        builds = []
+
+        async def build(self, content, source_hash):
+            builds.append(source_hash)
+            if len(builds) == 1:
+                try:
+                    await asyncio.sleep(3600)
+                except asyncio.CancelledError:
+                    # tearing down takes a while, so the task is still pending when the next caller comes
+                    await asyncio.sleep(0.05)
+                    raise
+            return "fresh summary"
+
+        def content():
+            return SimpleNamespace(id="c1", raw_text="transcript", summary=None, summary_source_hash=None)
+
+        async def scenario():
+            service = YoutubeService()
+            first = asyncio.create_task(service.get_content_summary(content()))
+            await asyncio.sleep(0)
+            first.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            return await service.get_content_summary(content())
+
+        with mock.patch.object(YoutubeService, "_build_content_summary", build):
+            self.assertEqual(asyncio.run(scenario()), "fresh summary")
+        self.assertEqual(len(builds), 2)
+        self.assertEqual(youtube._summary_tasks, {})
+        self.assertEqual(youtube._summary_waiters, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
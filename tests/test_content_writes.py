@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import workers.process_youtube_links as worker
+
+
+class FakeContentCollection:
+    """Stands in for ContentModel, applying find_one(...).update({"$set": ...}) to one stored document."""
+
+    def __init__(self, document: dict):
+        self.document = document
+        # ContentModel.id == content.id builds the filter; the fake only has one document
+        self.id = mock.MagicMock()
+
+    def find_one(self, *args):
+        store = self.document
+
+        class Query:
+            async def update(self, update: dict):
+                store.update(update["$set"])
+
+        return Query()
+
+
+class FakeYoutubeService:
+    def chunk_comments(self, comments):
+        yield comments
+
+    async def setiment_analysis(self, chunk):
+        return {"distribution": {"positive": 1}, "summary": "liked", "top_positive_comments": [], "top_negative_comments": []}
+
+    async def sentiment_analysis_aggregate(self, **kwargs):
+        return {"overall": "positive"}
+
+    async def generate_ideas_from_comments(self, chunk):
+        return {"ideas": ["a follow-up video"]}
+
+    async def generate_ideas_from_comments_aggregate(self, ideas):
+        return {"ideas": ideas}
+
+
+class ConcurrentContentWritesTest(unittest.TestCase):
+    """Jobs of the same content each load it at the start and must only write the fields they own."""
+
+    def run_jobs(self, order):
+        stored = {"summary": "shared summary", "summary_source_hash": "h", "sentiment": None, "ideas_from_comments": None}
+        collection = FakeContentCollection(stored)
+        youtube_service = FakeYoutubeService()
+        comments = SimpleNamespace(comments=[SimpleNamespace(text="great video")])
+
+        def stale_content():
+            # what a job loaded before any of the others finished, from before the summary existed
+            return SimpleNamespace(id="c1", summary=None, summary_source_hash=None, sentiment=None, ideas_from_comments=None)
+
+        jobs = {
+            "sentiment": lambda: worker.process_comment_sentiment_analysis(SimpleNamespace(), stale_content()),
+            "ideas": lambda: worker.process_comment_idea_generation(SimpleNamespace(), stale_content()),
+        }
+        with mock.patch.object(worker, "ContentModel", collection), \
+                mock.patch.object(worker, "get_youtube_service", return_value=youtube_service), \
+                mock.patch.object(worker, "get_shared_comments", mock.AsyncMock(return_value=comments)):
+            for name in order:
+                asyncio.run(jobs[name]())
+        return stored
+
+    def test_both_results_survive_in_either_order(self):
+        for order in (["sentiment", "ideas"], ["ideas", "sentiment"]):
+            with self.subTest(order=order):
+                stored = self.run_jobs(order)
+                self.assertEqual(stored["sentiment"], {"overall": "positive"})
+                self.assertEqual(stored["ideas_from_comments"], ["a follow-up video"])
+                self.assertEqual(stored["summary"], "shared summary")
+                self.assertEqual(stored["summary_source_hash"], "h")
+
+
+if __name__ == "__main__":
+    unittest.main()
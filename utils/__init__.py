@@ -2,3 +2,6 @@ from .json_to_markdown import json_to_markdown, json_to_clean_markdown
 from .cookie import set_auth_cookie, clear_auth_cookie
 from .jwt import create_access_token, decode_token
 from .password import verify_password, hash_password
+from .sse import format_sse_event, stream_sse_events
+from .json_repair import repair_json, parse_json
+from .text import normalize_whitespace
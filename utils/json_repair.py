@@ -0,0 +1,70 @@
+from typing import Any
+import json
+import re
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_SMART_QUOTES = "“”"
+
+
+def repair_json(text: str) -> str:
+    """
+    Fixes the usual ways a model breaks JSON: markdown fences, prose around the object,
+    smart quotes used as delimiters, trailing commas and output cut off before the closing
+    brackets. String values are left as they are.
+    """
+    text = _FENCE.sub("", text or "").strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if starts:
+        text = text[min(starts):]
+
+    out = []
+    closers = []
+    in_string = escaped = smart_string = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"' or (smart_string and char in _SMART_QUOTES):
+                char = '"'
+                in_string = False
+            out.append(char)
+            continue
+        if char == '"' or char in _SMART_QUOTES:
+            in_string, smart_string = True, char != '"'
+            out.append('"')
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            out.append(char)
+            if closers:
+                closers.pop()
+                if not closers:
+                    # drop anything after the top-level value
+                    break
+        else:
+            out.append(char)
+    if in_string:
+        out.append('"')
+    for closer in reversed(closers):
+        _drop_trailing_comma(out)
+        out.append(closer)
+    return "".join(out)
+
+
+def _drop_trailing_comma(out: list):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def parse_json(text: str) -> Any:
+    """json.loads, retried once on the repaired text. Raises json.JSONDecodeError if both fail."""
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return json.loads(repair_json(text))
@@ -0,0 +1,19 @@
+import json
+
+def format_sse_event(event: str, data) -> str:
+    payload = data if isinstance(data, str) else json.dumps(data)
+    # every line of a multi-line payload needs its own data: field
+    lines = "\n".join(f"data: {line}" for line in payload.split("\n"))
+    return f"event: {event}\n{lines}\n\n"
+
+
+async def stream_sse_events(events):
+    """
+    Formats (event, data) pairs as Server-Sent Events, reporting a failure as a final error event.
+    """
+    try:
+        async for event, data in events:
+            yield format_sse_event(event, data)
+    except Exception as e:
+        yield format_sse_event("error", {"message": f"{type(e).__name__}: {str(e)}"})
+    yield format_sse_event("done", {})
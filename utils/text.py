@@ -0,0 +1,8 @@
+import re
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapses every run of whitespace, newlines included, into a single space."""
+    return _WHITESPACE.sub(' ', text or '').strip()
@@ -1,22 +1,74 @@
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+import os
+import socket
 import time
+import uuid
 from services import YoutubeService
-from schemas import ContentJob, ContentModel, BlogModel, SocialModal, SocialData, CommentModel, Comment, init_db
+from services.usage_tracker import UsageTracker, track_usage
+from services.model_router import job_context
+from services.job_notifier import get_job_notifier
+from services.job_queue import next_job_candidates, job_max_attempts, retry_delay
+from services.job_errors import IncompleteResponseError, is_retryable_job_error
+from services.pipeline import PipelineInputPending, require_node
+from services.llm_batch import BATCH_RESULTS, BatchResultPending, gather_batched, get_batch_dispatcher, watch_batch_requests
+from services.llm_service import get_openai_client
+from services.checkpoints import checkpoint_scope, checkpoint_store, checkpointed
+from services.llm_telemetry import llm_telemetry
+from services.cpu_pool import cpu_pool
+from prompts import prompt_cache_stats
+from schemas import ContentJob, ContentModel, BlogModel, SocialModal, SocialData, CommentModel, Comment, PipelineNode, init_db
 import asyncio
-from enums import JobStatus, JobContext
+import hashlib
+import signal
+from enums import JobStatus, JobContext, LlmStage, PipelineNodeKind
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import traceback
+from typing import Dict, List, Optional, Set
+from beanie import PydanticObjectId
+from beanie.operators import In
+from beanie.odm.queries.update import UpdateResponse
+from config import settings
 
 logging.basicConfig(level=logging.INFO)
 
+SOCIAL_CONTEXTS = [JobContext.TWITTER_POST, JobContext.REDDIT_POST, JobContext.LINKED_IN_POST, JobContext.FACEBOOK_POST]
+
+# identifies this process as the lease owner of the jobs it claims
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# slot task running each job, so a cancelled job can be stopped mid-call
+running_jobs: Dict[str, asyncio.Task] = {}
+# jobs being stopped because they were cancelled, as opposed to by worker shutdown
+cancelled_jobs: Set[str] = set()
+# every job this process holds a lease on and is working on: running jobs and the siblings fused into them
+leased_jobs: Set[str] = set()
+
+def lease_fields() -> dict:
+    now = datetime.utcnow()
+    return {
+        "lease_owner": WORKER_ID,
+        "lease_expires_at": now + timedelta(seconds=settings.WORKER_LEASE_SECONDS),
+        "heartbeat_at": now,
+        "updated_at": now,
+    }
+
+def get_youtube_service(content_job: ContentJob) -> YoutubeService:
+    # non-urgent contexts go through the cheaper batch API instead of interactive calls
+    return YoutubeService(batch=str(content_job.context) in settings.LLM_BATCH_CONTEXTS)
+
 async def process_content(content_job: ContentJob):
     content_id = content_job.content_id
     if not content_id:
         logging.error("Content ID is missing in the content job.")
         return
     content = await ContentModel.get(content_id)
+    if content_job.context in SOCIAL_CONTEXTS and (
+        settings.FUSED_SOCIAL_GENERATION or content_job.context not in (JobContext.TWITTER_POST, JobContext.REDDIT_POST)
+    ):
+        await process_social_posts(content_job, content)
+        content_job.status = JobStatus.COMPLETED
+        content_job.completed = True
+        return
     if content_job.context == JobContext.BLOG:
         await process_blog_content(content_job, content)
         content_job.status = JobStatus.COMPLETED
@@ -38,21 +90,61 @@ async def process_content(content_job: ContentJob):
         content_job.status = JobStatus.COMPLETED
         content_job.completed = True
 
-async def process_comment_sentiment_analysis(content_job: ContentJob, content: ContentModel):
+async def get_shared_comments(content_job: ContentJob, content: ContentModel, youtube_service: YoutubeService) -> Optional[CommentModel]:
+    """
+    The content's comments, fetched once per content no matter how many comment jobs need them.
+    """
     content_id = str(content.id)
-    comments = await CommentModel.find_one(CommentModel.contentId == content_id, CommentModel.is_active == True)
-    youtube_service = YoutubeService()
-    video_id = youtube_service.extract_video_id(content.link)
-    if not comments:
+
+    async def fetch_comments():
+        if await CommentModel.find_one(CommentModel.contentId == content_id, CommentModel.is_active == True):
+            return
+        video_id = youtube_service.extract_video_id(content.link)
         fetched_comments = await youtube_service.get_all_comments(video_id)
-        print(f"Fetched {comments} comments for content ID {content_id}.")
-        comments = CommentModel(
+        logging.info(f"Fetched {len(fetched_comments)} comments for content ID {content_id}.")
+        await CommentModel(
             contentId=content_id,
             comments=[Comment(text=comment["text"], name=comment["name"]) for comment in fetched_comments],
             is_active=True,
             job_id=str(content_job.id),
-        )
-        await comments.insert()
+        ).insert()
+
+    await require_node(content_id, PipelineNodeKind.COMMENTS, fetch_comments, owner=WORKER_ID)
+    return await CommentModel.find_one(CommentModel.contentId == content_id, CommentModel.is_active == True)
+
+async def get_shared_summary(content: ContentModel, youtube_service: YoutubeService) -> str:
+    """
+    The content's transcript summary, built by one job per transcript version across all workers.
+    """
+    source_hash = hashlib.sha256((content.raw_text or "").encode("utf-8")).hexdigest()
+    await require_node(
+        str(content.id),
+        PipelineNodeKind.SUMMARY,
+        lambda: youtube_service.get_content_summary(content),
+        owner=WORKER_ID,
+        input_hash=source_hash,
+    )
+    # stored by now; this only reads it back
+    return await youtube_service.get_content_summary(content)
+
+async def map_comment_chunks(stage: LlmStage, chunks, analyze) -> list:
+    """
+    Runs analyze on every comment chunk concurrently, up to SUMMARY_CONCURRENCY at a time,
+    and returns the results in chunk order. In batch mode all chunks are queued before the
+    job is parked, so they go out in the same batch.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.SUMMARY_CONCURRENCY))
+
+    async def run(index: int, chunk: List[Comment]):
+        async with semaphore:
+            return await checkpointed(stage, str(index), lambda: analyze(chunk))
+
+    return await gather_batched(*(run(index, chunk) for index, chunk in enumerate(chunks)))
+
+async def process_comment_sentiment_analysis(content_job: ContentJob, content: ContentModel):
+    content_id = str(content.id)
+    youtube_service = get_youtube_service(content_job)
+    comments = await get_shared_comments(content_job, content, youtube_service)
     if not comments or not comments.comments:
         logging.error(f"No comments found for content ID {content_id}.")
         return
@@ -61,8 +153,10 @@ async def process_comment_sentiment_analysis(content_job: ContentJob, content: C
     top_positives = []
     top_negatives = []
     comment_vals = comments.comments
-    for chunk in youtube_service.chunk_comments(comment_vals):
-        sentiment_analysis = await youtube_service.setiment_analysis(chunk)
+    analyses = await map_comment_chunks(
+        LlmStage.COMMENT_SENTIMENT, youtube_service.chunk_comments(comment_vals), youtube_service.setiment_analysis
+    )
+    for sentiment_analysis in analyses:
         all_distributions.append(sentiment_analysis["distribution"])
         all_summaries.append(sentiment_analysis["summary"])
         top_positives.extend(sentiment_analysis["top_positive_comments"])
@@ -75,47 +169,166 @@ async def process_comment_sentiment_analysis(content_job: ContentJob, content: C
         top_negatives=top_negatives
     )
     if aggregated_sentiment != None:
-        content.sentiment = aggregated_sentiment
-        content.updated_at = datetime.utcnow()
-        await content.save()
+        # only this job's field: other jobs of the same content write theirs concurrently
+        await ContentModel.find_one(ContentModel.id == content.id).update(
+            {"$set": {"sentiment": aggregated_sentiment, "updated_at": datetime.utcnow()}}
+        )
     return
 
 async def process_comment_idea_generation(content_job: ContentJob, content: ContentModel):
     content_id = str(content.id)
-    comments = await CommentModel.find_one(CommentModel.contentId == content_id, CommentModel.is_active == True)
-    youtube_service = YoutubeService()
-    video_id = youtube_service.extract_video_id(content.link)
-    if not comments:
-        fetched_comments = await youtube_service.get_all_comments(video_id)
-        comments = CommentModel(
-            contentId=content_id,
-            comments=[Comment(text=comment["text"], name=comment["name"]) for comment in fetched_comments],
-            is_active=True,
-            job_id=str(content_job.id),
-        )
-        await comments.insert()
+    youtube_service = get_youtube_service(content_job)
+    comments = await get_shared_comments(content_job, content, youtube_service)
     if not comments or not comments.comments:
         logging.error(f"No comments found for content ID {content_id}.")
         return
     comment_vals = comments.comments
     generated_ideas = []
-    for chunk in youtube_service.chunk_comments(comment_vals):
-        gen_ideas = await youtube_service.generate_ideas_from_comments(chunk)
+    chunk_ideas = await map_comment_chunks(
+        LlmStage.COMMENT_IDEAS, youtube_service.chunk_comments(comment_vals), youtube_service.generate_ideas_from_comments
+    )
+    for gen_ideas in chunk_ideas:
         if gen_ideas and gen_ideas.get("ideas"):
             for idea in gen_ideas["ideas"]:
                 generated_ideas.append(idea)
 
     if(len(generated_ideas) != 0):
         aggregate_ideas = await youtube_service.generate_ideas_from_comments_aggregate(generated_ideas)
-        content.ideas_from_comments = aggregate_ideas["ideas"] or []
-        content.updated_at = datetime.utcnow()
-        await content.save()
+        await ContentModel.find_one(ContentModel.id == content.id).update(
+            {"$set": {"ideas_from_comments": aggregate_ideas["ideas"] or [], "updated_at": datetime.utcnow()}}
+        )
+    return
+
+async def claim_sibling_social_jobs(content_job: ContentJob) -> List[ContentJob]:
+    """
+    Claims the other pending social jobs of the same content so they can share one LLM call.
+    With FUSED_SOCIAL_GENERATION off every job is generated on its own.
+    """
+    if not settings.FUSED_SOCIAL_GENERATION:
+        return []
+    candidates = await ContentJob.find(
+        ContentJob.content_id == content_job.content_id,
+        In(ContentJob.context, SOCIAL_CONTEXTS),
+        ContentJob.status == JobStatus.PENDING,
+        ContentJob.completed == False,
+    ).to_list()
+    claimed = []
+    contexts = {content_job.context}
+    for candidate in candidates:
+        if candidate.context in contexts:
+            continue
+        # conditional update, so a job another worker picked up meanwhile is left alone
+        sibling = await ContentJob.find_one(
+            ContentJob.id == candidate.id,
+            ContentJob.status == JobStatus.PENDING,
+        ).update(
+            {"$set": {"status": JobStatus.IN_PROGRESS, "started_at": datetime.utcnow(), **lease_fields()}, "$inc": {"attempts": 1}},
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+        if sibling:
+            leased_jobs.add(str(sibling.id))
+            claimed.append(sibling)
+            contexts.add(sibling.context)
+    return claimed
+
+async def process_social_posts(content_job: ContentJob, content: ContentModel):
+    youtube_service = get_youtube_service(content_job)
+    sibling_jobs = await claim_sibling_social_jobs(content_job)
+    try:
+        await generate_social_posts(content_job, sibling_jobs, content, youtube_service)
+    except BaseException:
+        # includes cancellation; the failure itself is recorded on content_job
+        await release_sibling_jobs(sibling_jobs)
+        raise
+    finally:
+        for sibling in sibling_jobs:
+            leased_jobs.discard(str(sibling.id))
+
+async def release_sibling_jobs(sibling_jobs: List[ContentJob]):
+    """
+    Hands fused siblings that were not finished back to the queue without counting the
+    attempt. Siblings cancelled along with their content stay cancelled and only lose the lease.
+    """
+    if not sibling_jobs:
+        return
+    sibling_ids = [sibling.id for sibling in sibling_jobs]
+    released = {"lease_owner": None, "lease_expires_at": None, "updated_at": datetime.utcnow()}
+    requeued = await ContentJob.find(
+        In(ContentJob.id, sibling_ids),
+        ContentJob.lease_owner == WORKER_ID,
+        ContentJob.status == JobStatus.IN_PROGRESS,
+    ).update({"$set": {"status": JobStatus.PENDING, **released}, "$inc": {"attempts": -1}})
+    await ContentJob.find(
+        In(ContentJob.id, sibling_ids),
+        ContentJob.lease_owner == WORKER_ID,
+        ContentJob.status == JobStatus.CANCELLED,
+    ).update({"$set": released})
+    if requeued and requeued.modified_count:
+        await get_job_notifier().publish()
+
+def retry_missing_platform(content_job: ContentJob):
+    """Schedules another attempt for a sibling whose platform the model left out, like a retryable failure."""
+    content_job.error = f"IncompleteResponseError: no {content_job.context} posts in the fused response"
+    if content_job.attempts >= job_max_attempts(content_job):
+        content_job.status = JobStatus.DEAD_LETTER
+    else:
+        content_job.status = JobStatus.PENDING
+        content_job.next_run_at = datetime.utcnow() + retry_delay(content_job.attempts)
+
+async def generate_social_posts(content_job: ContentJob, sibling_jobs: List[ContentJob], content: ContentModel, youtube_service: YoutubeService):
+    content_id = str(content.id)
+    jobs = [content_job] + sibling_jobs
+    summary = await get_shared_summary(content, youtube_service)
+    results = await youtube_service.extract_social_posts(
+        content.raw_text,
+        {job.context: (job.metadata or {}).get("count", 1) for job in jobs},
+        summary=summary,
+    )
+
+    social_posts = []
+    for job in jobs:
+        if job.context not in results:
+            continue
+        for post in results[job.context].posts:
+            social_posts.append(SocialModal(
+                contentId=content_id,
+                data=SocialData(
+                    content=post.content,
+                    hashTags=post.hashtags,
+                    title=post.title,
+                    tone=post.tone
+                ),
+                is_active=True,
+                job_id=str(job.id),
+                type=job.context,
+            ))
+    if social_posts:
+        await SocialModal.insert_many(social_posts)
+    else:
+        logging.error(f"Failed to extract social posts for content ID {content_id}.")
+
+    for sibling in sibling_jobs:
+        if sibling.context in results:
+            sibling.status = JobStatus.COMPLETED
+            sibling.completed = True
+            sibling.metadata = {**(sibling.metadata or {}), "processed_at": str(datetime.utcnow()), "fused_into": str(content_job.id)}
+        else:
+            retry_missing_platform(sibling)
+        sibling.updated_at = datetime.utcnow()
+        await save_leased_job(sibling)
+    if any(sibling.status == JobStatus.PENDING for sibling in sibling_jobs):
+        await get_job_notifier().publish()
+    await ContentModel.find_one(ContentModel.id == content.id).update({"$set": {"updated_at": datetime.utcnow()}})
+    if content_job.context not in results:
+        raise IncompleteResponseError(f"No {content_job.context} posts in the fused response for content ID {content_id}")
+    logging.info(f"Generated {', '.join(str(job.context) for job in jobs if job.context in results)} posts for content ID {content_id} in one call.")
     return
 
 async def process_reddit_posts(content_job: ContentJob, content: ContentModel):
     content_id = str(content.id)
-    youtube_service = YoutubeService()
-    reddit_posts = await youtube_service.extract_reddit_posts(content.raw_text, content_job.metadata.get("count", 1))
+    youtube_service = get_youtube_service(content_job)
+    summary = await get_shared_summary(content, youtube_service)
+    reddit_posts = await youtube_service.extract_reddit_posts(content.raw_text, content_job.metadata.get("count", 1), summary=summary)
     if not reddit_posts:
         logging.error(f"Failed to extract Reddit posts for content ID {content_id}.")
         return
@@ -135,14 +348,14 @@ async def process_reddit_posts(content_job: ContentJob, content: ContentModel):
         )
         social_posts.append(post_data)
     await SocialModal.insert_many(social_posts)
-    content.updated_at = datetime.utcnow()
-    await content.save()
+    await ContentModel.find_one(ContentModel.id == content.id).update({"$set": {"updated_at": datetime.utcnow()}})
     return
 
 async def process_twitter_posts(content_job: ContentJob, content: ContentModel):
     content_id = str(content.id)
-    youtube_service = YoutubeService()
-    twitter_posts = await youtube_service.extract_twitter_posts(content.raw_text, content_job.metadata.get("count", 1))
+    youtube_service = get_youtube_service(content_job)
+    summary = await get_shared_summary(content, youtube_service)
+    twitter_posts = await youtube_service.extract_twitter_posts(content.raw_text, content_job.metadata.get("count", 1), summary=summary)
     if not twitter_posts:
         logging.error(f"Failed to extract Twitter posts for content ID {content_id}.")
         return
@@ -162,14 +375,14 @@ async def process_twitter_posts(content_job: ContentJob, content: ContentModel):
         )
         social_posts.append(post_data)
     await SocialModal.insert_many(social_posts)
-    content.updated_at = datetime.utcnow()
-    await content.save()
+    await ContentModel.find_one(ContentModel.id == content.id).update({"$set": {"updated_at": datetime.utcnow()}})
     return
 
 async def process_blog_content(content_job: ContentJob, content: ContentModel):
     content_id = str(content.id)
-    youtube_service = YoutubeService()
-    blog_post = await youtube_service.extract_content_from_transcript(content.raw_text)
+    youtube_service = get_youtube_service(content_job)
+    summary = await get_shared_summary(content, youtube_service)
+    blog_post = await youtube_service.extract_content_from_transcript(content.raw_text, summary=summary)
     if not blog_post:
         logging.error(f"Failed to extract content from transcript for content ID {content_id}.")
         return
@@ -180,74 +393,321 @@ async def process_blog_content(content_job: ContentJob, content: ContentModel):
         job_id=str(content_job.id),
     )
     await blog_post_data.insert()
-    content.updated_at = datetime.utcnow()
-    await content.save()
+    await ContentModel.find_one(ContentModel.id == content.id).update({"$set": {"updated_at": datetime.utcnow()}})
     return
 
-async def process_next_job():
-    content_job = None
-    try:
-        content_job = await ContentJob.find_one({
-            "completed": False,
-            "status": JobStatus.PENDING
-        })
+def record_job_usage(content_job: ContentJob, usage_tracker: UsageTracker):
+    content_job.token_used = usage_tracker.total_tokens
+    content_job.usage = usage_tracker.to_dict()
+    logging.info(f"Job {content_job.id} ({content_job.context}) used {content_job.token_used} tokens: {content_job.usage['stages']}")
+    logging.info(f"Prompt prefix cache: {prompt_cache_stats.snapshot()}")
+    logging.info(f"LLM route telemetry: {llm_telemetry.snapshot()}")
+    logging.info(f"CPU pool: {cpu_pool.stats()}")
 
-        if not content_job:
-            logging.info("No pending job found.")
-            return
+async def claim_next_job() -> Optional[ContentJob]:
+    """
+    Leases the next pending job to this worker and returns it, or None when the queue is empty.
+    Candidates come in priority and per-user fair-share order. The update is conditional on
+    the job still being pending, so concurrent slots and replicas never share a job.
+    """
+    while True:
+        candidates = await next_job_candidates()
+        if not candidates:
+            return None
+        for candidate in candidates:
+            content_job = await ContentJob.find_one(
+                ContentJob.id == candidate["job_id"],
+                ContentJob.status == JobStatus.PENDING,
+            ).update(
+                {"$set": {"status": JobStatus.IN_PROGRESS, "started_at": datetime.utcnow(), **lease_fields()}, "$inc": {"attempts": 1}},
+                response_type=UpdateResponse.NEW_DOCUMENT,
+            )
+            if content_job:
+                wait = (content_job.started_at - content_job.created_at).total_seconds()
+                logging.info(f"Claimed job {content_job.id} ({content_job.context}, priority {content_job.priority}) for user {content_job.user_id} after {wait:.1f}s in queue")
+                return content_job
 
-        logging.info(f"Processing job {content_job.id}")
-        content_job.status = JobStatus.IN_PROGRESS
-        content_job.updated_at = datetime.utcnow()
-        await content_job.save()
+async def save_leased_job(content_job: ContentJob) -> bool:
+    """
+    Writes the job's outcome and releases its lease, but only while this worker still holds
+    the lease. A job that was re-queued and picked up elsewhere is left to its new owner.
+    """
+    fields = content_job.model_dump(include={"status", "completed", "token_used", "usage", "error", "metadata", "attempts", "next_run_at", "waiting_on", "updated_at"})
+    released = {"lease_owner": None, "lease_expires_at": None}
+    conditions = [ContentJob.id == content_job.id, ContentJob.lease_owner == WORKER_ID]
+    if content_job.status != JobStatus.CANCELLED:
+        # a cancel that lands while the job is finishing wins over its outcome
+        conditions.append(ContentJob.status != JobStatus.CANCELLED)
+    result = await ContentJob.find_one(*conditions).update({"$set": {**fields, **released}})
+    if not result.matched_count:
+        cancelled = await ContentJob.find_one(
+            ContentJob.id == content_job.id,
+            ContentJob.lease_owner == WORKER_ID,
+            ContentJob.status == JobStatus.CANCELLED,
+        ).update({"$set": {"token_used": content_job.token_used, "usage": content_job.usage, **released}})
+        if cancelled.matched_count:
+            logging.info(f"Job {content_job.id} was cancelled; discarding its result.")
+            return False
+        logging.warning(f"Job {content_job.id} is no longer leased to {WORKER_ID}; discarding its result.")
+        return False
+    return True
+
+async def heartbeat_leases():
+    """
+    Renews the leases of the jobs this worker is actually running. A job whose task died
+    without saving its outcome drops out of leased_jobs, so its lease runs out and the
+    reaper re-queues it.
+    """
+    while True:
+        await asyncio.sleep(settings.WORKER_HEARTBEAT_SECONDS)
+        try:
+            if leased_jobs:
+                await ContentJob.find(
+                    In(ContentJob.id, [PydanticObjectId(job_id) for job_id in leased_jobs]),
+                    ContentJob.lease_owner == WORKER_ID,
+                    ContentJob.status == JobStatus.IN_PROGRESS,
+                ).update({"$set": lease_fields()})
+            await PipelineNode.find(
+                PipelineNode.owner == WORKER_ID,
+                PipelineNode.status == JobStatus.IN_PROGRESS,
+            ).update({"$set": {"lease_expires_at": lease_fields()["lease_expires_at"]}})
+        except Exception as e:
+            logging.error(f"Lease heartbeat failed: {e}")
+
+async def watch_cancellations():
+    """
+    Stops running jobs that were cancelled through the API. Cancelling the job's task aborts
+    its in-flight LLM requests, so the tokens and the slot go to live work straight away.
+    """
+    while True:
+        await asyncio.sleep(settings.JOB_CANCEL_POLL_SECONDS)
+        if not running_jobs:
+            continue
+        try:
+            cancelled = await ContentJob.find(
+                In(ContentJob.id, [PydanticObjectId(job_id) for job_id in running_jobs]),
+                ContentJob.status == JobStatus.CANCELLED,
+            ).to_list()
+        except Exception as e:
+            logging.error(f"Cancellation check failed: {e}")
+            continue
+        for content_job in cancelled:
+            job_id = str(content_job.id)
+            task = running_jobs.get(job_id)
+            if task and job_id not in cancelled_jobs:
+                logging.info(f"Job {job_id} was cancelled, stopping it.")
+                cancelled_jobs.add(job_id)
+                task.cancel()
 
-        # Simulate actual processing
-        await process_content(content_job=content_job)
+async def requeue_expired_jobs() -> int:
+    """
+    Returns IN_PROGRESS jobs whose lease ran out to the queue, or dead-letters them once they
+    have used up their attempts. Jobs claimed before leases existed have none, so those fall
+    back to updated_at.
+    """
+    now = datetime.utcnow()
+    expired = {"$or": [
+        {"lease_expires_at": {"$lt": now}},
+        {"lease_expires_at": None, "updated_at": {"$lt": now - timedelta(seconds=settings.WORKER_LEASE_SECONDS)}},
+    ]}
+    exhausted = {"$expr": {"$gte": ["$attempts", {"$ifNull": ["$max_attempts", settings.JOB_MAX_ATTEMPTS]}]}}
+    released = {"lease_owner": None, "lease_expires_at": None, "updated_at": now}
+    dead = await ContentJob.find(ContentJob.status == JobStatus.IN_PROGRESS, expired, exhausted).update({"$set": {
+        "status": JobStatus.DEAD_LETTER,
+        "error": "Worker lease expired on the last attempt",
+        **released,
+    }})
+    if dead and dead.modified_count:
+        logging.error(f"Dead-lettered {dead.modified_count} jobs whose lease expired on their last attempt.")
+    result = await ContentJob.find(ContentJob.status == JobStatus.IN_PROGRESS, expired).update({"$set": {
+        "status": JobStatus.PENDING,
+        **released,
+    }})
+    if result and result.modified_count:
+        logging.warning(f"Re-queued {result.modified_count} jobs with expired leases.")
+        await get_job_notifier().publish()
+    return result.modified_count if result else 0
 
+async def reap_expired_leases():
+    while True:
+        try:
+            await requeue_expired_jobs()
+        except Exception as e:
+            logging.error(f"Lease reaper failed: {e}")
+        await asyncio.sleep(settings.WORKER_REAPER_INTERVAL_SECONDS)
+
+async def park_job(content_job: ContentJob, waiting_on: str, wait_seconds: float) -> bool:
+    """Puts a job back as PENDING until what it waits on is ready, without using up an attempt."""
+    content_job.status = JobStatus.PENDING
+    content_job.waiting_on = waiting_on
+    content_job.attempts -= 1
+    # safety net in case the wake-up is missed
+    content_job.next_run_at = datetime.utcnow() + timedelta(seconds=wait_seconds)
+    content_job.updated_at = datetime.utcnow()
+    return await save_leased_job(content_job)
+
+async def run_job(content_job: ContentJob):
+    usage_tracker = None
+    try:
+        logging.info(f"Processing job {content_job.id}")
+        with track_usage() as usage_tracker, job_context(content_job.context), checkpoint_scope(str(content_job.id)):
+            await process_content(content_job=content_job)
+
+        record_job_usage(content_job, usage_tracker)
         content_job.updated_at = datetime.utcnow()
         content_job.metadata = {"processed_at": str(datetime.utcnow())}
-        await content_job.save()
-
-        logging.info(f"Job {content_job.id} completed.")
+        if await save_leased_job(content_job):
+            await checkpoint_store.clear(str(content_job.id))
+            logging.info(f"Job {content_job.id} completed.")
+    except PipelineInputPending as e:
+        # not a failure: park the job until the node is done, without using up an attempt
+        logging.info(f"Job {content_job.id} deferred: {e}")
+        await park_job(content_job, str(e.node), settings.PIPELINE_WAIT_SECONDS)
+    except BatchResultPending as e:
+        # the slot goes to other work while the batch runs; finished calls are checkpointed
+        logging.info(f"Job {content_job.id} deferred: {e}")
+        if await park_job(content_job, BATCH_RESULTS, settings.LLM_BATCH_WAIT_SECONDS):
+            await watch_batch_requests(str(content_job.id), e.keys)
+    except asyncio.CancelledError:
+        if str(content_job.id) in cancelled_jobs:
+            # keep what was spent before the cancel on the job's usage
+            if usage_tracker:
+                record_job_usage(content_job, usage_tracker)
+            content_job.status = JobStatus.CANCELLED
+            content_job.updated_at = datetime.utcnow()
+            await save_leased_job(content_job)
+        raise
     except Exception as e:
         error_msg = f"{type(e).__name__}: {str(e)}"
         tb = traceback.format_exc()
-    
-        logging.error(f"Error processing job {content_job.id if content_job else 'None'}: {error_msg}")
-        logging.error(f"Traceback:\n{tb}")        
-        if content_job:
+
+        logging.error(f"Error processing job {content_job.id}: {error_msg}")
+        logging.error(f"Traceback:\n{tb}")
+        content_job.error = error_msg
+        if not is_retryable_job_error(e):
             content_job.status = JobStatus.FAILED
-            content_job.error = str(e)
-            content_job.updated_at = datetime.utcnow()
-            await content_job.save()
-        logging.error(f"Error processing job: {e}")
+        elif content_job.attempts >= job_max_attempts(content_job):
+            logging.error(f"Job {content_job.id} dead-lettered after {content_job.attempts} attempts.")
+            content_job.status = JobStatus.DEAD_LETTER
+        else:
+            content_job.status = JobStatus.PENDING
+            content_job.next_run_at = datetime.utcnow() + retry_delay(content_job.attempts)
+            logging.warning(f"Job {content_job.id} will retry after {content_job.next_run_at} (attempt {content_job.attempts} of {job_max_attempts(content_job)}).")
+        if usage_tracker:
+            record_job_usage(content_job, usage_tracker)
+        content_job.updated_at = datetime.utcnow()
+        await save_leased_job(content_job)
+    finally:
+        # whatever finished before a failure or shutdown is kept for the next attempt
+        await checkpoint_store.flush()
+        checkpoint_store.forget(str(content_job.id))
+
+async def process_next_job() -> bool:
+    """Claims and runs one job. Returns False when there was nothing to do."""
+    content_job = await claim_next_job()
+    if not content_job:
+        return False
+    job_id = str(content_job.id)
+    running_jobs[job_id] = asyncio.current_task()
+    leased_jobs.add(job_id)
+    try:
+        await run_job(content_job)
+    except asyncio.CancelledError:
+        if job_id not in cancelled_jobs:
+            raise
+        # only the job was cancelled, not the worker: the slot carries on
+        asyncio.current_task().uncancel()
+        logging.info(f"Job {job_id} cancelled.")
+    finally:
+        running_jobs.pop(job_id, None)
+        leased_jobs.discard(job_id)
+        cancelled_jobs.discard(job_id)
+    return True
 
+async def release_leases():
+    """Hands this worker's unfinished jobs and nodes back to the queue without counting the attempt."""
+    now = datetime.utcnow()
+    await ContentJob.find(
+        ContentJob.lease_owner == WORKER_ID,
+        ContentJob.status == JobStatus.IN_PROGRESS,
+    ).update({
+        "$set": {"status": JobStatus.PENDING, "lease_owner": None, "lease_expires_at": None, "updated_at": now},
+        "$inc": {"attempts": -1},
+    })
+    # jobs cancelled while this worker was stopping only need their lease dropped
+    await ContentJob.find(
+        ContentJob.lease_owner == WORKER_ID,
+        ContentJob.status == JobStatus.CANCELLED,
+    ).update({"$set": {"lease_owner": None, "lease_expires_at": None, "updated_at": now}})
+    await PipelineNode.find(
+        PipelineNode.owner == WORKER_ID,
+        PipelineNode.status == JobStatus.IN_PROGRESS,
+    ).update({"$set": {"status": JobStatus.PENDING, "owner": None, "lease_expires_at": None, "updated_at": now}})
 
-# def start_yt_processing_scheduler():
-#     print("Starting scheduler...")
-#     scheduler.add_job(process_next_job, 'interval', seconds=60)
-#     scheduler.add_job(lambda: asyncio.create_task(process_next_job()), 'interval', seconds=60)
-#     scheduler.start()
+async def worker_slot(slot: int, stopping: asyncio.Event):
+    """
+    Runs jobs back to back while the queue has work. An idle slot sleeps until a job
+    notification arrives, polling as a fallback with a delay that backs off exponentially
+    up to WORKER_IDLE_MAX_SECONDS; the next job resets the delay. The slot exits once
+    stopping is set and its current job is done.
+    """
+    notifier = get_job_notifier()
+    idle_delay = settings.WORKER_IDLE_MIN_SECONDS
+    while not stopping.is_set():
+        wakeup = notifier.listen()
+        try:
+            processed = await process_next_job()
+        except Exception as e:
+            # claiming failed (e.g. database unreachable); treat it like an empty queue
+            logging.error(f"Worker slot {slot} could not claim a job: {e}")
+            processed = False
+        if processed:
+            idle_delay = settings.WORKER_IDLE_MIN_SECONDS
+            continue
+        if await notifier.wait(wakeup, idle_delay):
+            idle_delay = settings.WORKER_IDLE_MIN_SECONDS
+        else:
+            idle_delay = min(idle_delay * 2, settings.WORKER_IDLE_MAX_SECONDS)
 
 
 async def start_worker():
-    scheduler = AsyncIOScheduler()
     await init_db()  # Ensure the database is initialized before starting the worker
-    # Run your async job every 60 seconds
-    scheduler.add_job(
-        process_next_job,
-        trigger=IntervalTrigger(seconds=60),
-        name="Process YouTube Jobs",
-        max_instances=1,
-        misfire_grace_time=30
-    )
+    notifier = get_job_notifier()
+    await notifier.start()
 
-    scheduler.start()
-    print("📅 Worker started. Running every 60 seconds.")
+    stopping = asyncio.Event()
+    def request_shutdown():
+        logging.info("Shutdown requested, finishing running jobs.")
+        stopping.set()
+        notifier.notify() # wakes idle slots so they see stopping
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, request_shutdown)
 
-    # Keep the event loop running
-    while True:
-        await asyncio.sleep(3600)
+    background = [
+        asyncio.create_task(heartbeat_leases()),
+        asyncio.create_task(reap_expired_leases()),
+        asyncio.create_task(watch_cancellations()),
+    ]
+    if settings.LLM_BATCH_CONTEXTS:
+        dispatcher = get_batch_dispatcher(get_openai_client(), owner=WORKER_ID)
+        background.append(asyncio.create_task(dispatcher.run_submissions()))
+        background.append(asyncio.create_task(dispatcher.run_polling()))
+    slots = [asyncio.create_task(worker_slot(slot, stopping)) for slot in range(max(1, settings.WORKER_CONCURRENCY))]
+    print(f"Worker {WORKER_ID} started with {settings.WORKER_CONCURRENCY} job slots.")
+    await stopping.wait()
+
+    _, unfinished = await asyncio.wait(slots, timeout=settings.WORKER_SHUTDOWN_GRACE_SECONDS)
+    for task in unfinished:
+        task.cancel()
+    await asyncio.gather(*unfinished, return_exceptions=True)
+    await checkpoint_store.flush()
+    await release_leases()
+    for task in background:
+        task.cancel()
+    await notifier.stop()
+    cpu_pool.shutdown()
+    logging.info(f"Worker {WORKER_ID} stopped; {len(unfinished)} interrupted jobs re-queued.")
 
 if __name__ == "__main__":
-    asyncio.run(start_worker())
\ No newline at end of file
+    asyncio.run(start_worker())